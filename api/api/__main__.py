@@ -1,11 +1,30 @@
+import os
+import shutil
+
 import uvicorn
 
 from api.gunicorn_runner import GunicornApplication
 from api.settings import settings
 
 
+def set_multiproc_dir() -> None:
+    """
+    Sets PROMETHEUS_MULTIPROC_DIR env variable.
+
+    This function cleans up the multiprocess directory
+    and recreates it. These actions are required by prometheus
+    to aggregate metrics of all gunicorn workers.
+    """
+    shutil.rmtree(settings.prometheus_dir, ignore_errors=True)
+    os.makedirs(settings.prometheus_dir, exist_ok=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = str(
+        settings.prometheus_dir.expanduser().absolute(),
+    )
+
+
 def main() -> None:
     """Entrypoint of the application."""
+    set_multiproc_dir()
     if settings.reload:
         uvicorn.run(
             "api.web.application:get_app",
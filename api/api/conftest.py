@@ -6,6 +6,7 @@ from fakeredis.aioredis import FakeConnection
 from fastapi import FastAPI
 from httpx import AsyncClient
 from redis.asyncio import ConnectionPool
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -15,6 +16,8 @@ from sqlalchemy.ext.asyncio import (
 
 from api.db.dependencies import get_db_session
 from api.db.utils import create_database, drop_database
+from api.services.init_data_cache.cache import InitDataCache
+from api.services.init_data_cache.dependency import get_init_data_cache
 from api.services.redis.dependency import get_redis_pool
 from api.settings import settings
 from api.web.application import get_app
@@ -46,6 +49,7 @@ async def _engine() -> AsyncGenerator[AsyncEngine, None]:
 
     engine = create_async_engine(str(settings.db_url))
     async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(meta.create_all)
 
     try:
@@ -74,6 +78,7 @@ async def dbsession(
     session_maker = async_sessionmaker(
         connection,
         expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
     )
     session = session_maker()
 
@@ -114,6 +119,8 @@ def fastapi_app(
     application = get_app()
     application.dependency_overrides[get_db_session] = lambda: dbsession
     application.dependency_overrides[get_redis_pool] = lambda: fake_redis_pool
+    init_data_cache = InitDataCache(maxsize=100, ttl=60)
+    application.dependency_overrides[get_init_data_cache] = lambda: init_data_cache
     return application  # noqa: WPS331
 
 
@@ -1,22 +1,141 @@
-from datetime import datetime
-from typing import List, Optional, Tuple
+import calendar
+from datetime import date, datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
 from fastapi import Depends
-from sqlalchemy import select, func, or_
-from sqlalchemy.dialects.postgresql import DATE
+from sqlalchemy import (
+    BigInteger, Integer, Row, Select, String, any_, literal, select, func, or_,
+    text, update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, DATE, insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from redis.asyncio import ConnectionPool
 
 from api.db.dependencies import get_db_session
 from api.db.models.user import UserModel
+from api.db.routing import USE_PRIMARY
+from api.services.redis.dependency import get_redis_pool
+from api.services.user_cache.cache import UserCache
 from api.settings import settings
 
+# Columns of user profiles. Listing queries select only these
+# and return plain rows instead of ORM instances.
+USER_COLUMNS = (
+    UserModel.id,
+    UserModel.chat_id,
+    UserModel.first_name,
+    UserModel.last_name,
+    UserModel.username,
+    UserModel.birthday,
+    UserModel.photo_url,
+    UserModel.date_started,
+)
+
+IMPORT_COLUMNS = (
+    "line_no", "chat_id", "first_name", "last_name", "username", "birthday",
+)
+
+CREATE_IMPORT_TABLE = """
+CREATE TEMPORARY TABLE users_import (
+    line_no integer NOT NULL,
+    chat_id bigint NOT NULL,
+    first_name varchar(50),
+    last_name varchar(50),
+    username varchar(50),
+    birthday timestamptz
+) ON COMMIT DROP
+"""
+
+# The last record of every chat_id wins, the birthday is kept
+# if the record has none. xmax = 0 only for freshly inserted rows;
+# ids of updated rows are returned to invalidate their cached profiles.
+MERGE_IMPORT_TABLE = """
+WITH merged AS (
+    INSERT INTO users (
+        chat_id, first_name, last_name, username, birthday, date_started
+    )
+    SELECT DISTINCT ON (chat_id)
+        chat_id, first_name, last_name, username, birthday, LOCALTIMESTAMP
+    FROM users_import
+    ORDER BY chat_id, line_no DESC
+    ON CONFLICT (chat_id) DO UPDATE SET
+        first_name = EXCLUDED.first_name,
+        last_name = EXCLUDED.last_name,
+        username = EXCLUDED.username,
+        birthday = COALESCE(EXCLUDED.birthday, users.birthday)
+    RETURNING id, xmax = 0 AS inserted
+)
+SELECT
+    count(*) FILTER (WHERE inserted) AS inserted,
+    count(*) FILTER (WHERE NOT inserted) AS updated,
+    array_agg(id) FILTER (WHERE NOT inserted) AS updated_ids
+FROM merged
+"""
+
+
+def upcoming_birthdays_query(
+    today: date,
+    days: int,
+    limit: Optional[int] = None,
+) -> Select[Any]:
+    """
+    Build the query for users whose birthday is within the next ``days`` days.
+
+    Filters on the indexed ``birthday_md`` column, so the lookup is a
+    range scan. When the window crosses New Year it is split into two
+    ranges, and users are ordered by the number of days remaining.
+    Feb 29 birthdays are celebrated on Mar 1 in common years.
+
+    :param today: first day of the window.
+    :param days: length of the window in days.
+    :param limit: maximum number of users to return.
+    :return: select of user rows.
+    """
+    start = today.month * 100 + today.day
+    if start == 301 and not calendar.isleap(today.year):
+        start = 229
+    query = select(*USER_COLUMNS)
+
+    if days >= 365:
+        query = query.where(UserModel.birthday_md.is_not(None))
+    else:
+        last_day = today + timedelta(days=days)
+        end = last_day.month * 100 + last_day.day
+        if start <= end:
+            query = query.where(UserModel.birthday_md.between(start, end))
+        else:
+            query = query.where(
+                or_(
+                    UserModel.birthday_md >= start,
+                    UserModel.birthday_md <= end,
+                )
+            )
+
+    query = query.order_by(
+        UserModel.birthday_md < start,
+        UserModel.birthday_md,
+        UserModel.id,
+    )
+    if limit:
+        query = query.limit(limit)
+    return query
+
 
 class UserDAO:
     """Class for accessing users table."""
 
-    def __init__(self, session: AsyncSession = Depends(get_db_session)):
+    def __init__(
+        self,
+        session: AsyncSession = Depends(get_db_session),
+        redis_pool: Optional[ConnectionPool] = Depends(get_redis_pool),
+    ):
         self.session = session
+        self.cache: Optional[UserCache] = None
+        if redis_pool is not None:
+            self.cache = UserCache(redis_pool)
+            if not self.cache.enabled:
+                self.cache = None
 
     async def create_user(
         self,
@@ -42,35 +161,136 @@ class UserDAO:
             await self.session.rollback()
             return False
 
-    async def set_birthday(
+    async def upsert_user(
         self,
-        user_id: int,
-        birthday: datetime
-    ) -> bool:
-        user = await self.get_user(user_id)
-        user.birthday = birthday
+        chat_id: int,
+        **profile: Optional[str],
+    ) -> UserModel:
+        """
+        Create user or refresh its Telegram profile in one statement.
+
+        Uses INSERT ... ON CONFLICT (chat_id) DO UPDATE ... RETURNING,
+        so concurrent first logins don't race into IntegrityError.
+        Only the given profile fields are written to an existing user;
+        photo is also kept when None is given for it.
+
+        :param chat_id: telegram id of user.
+        :param profile: first_name, last_name, username and photo_url.
+        :return: created or updated user.
+        """
+        query = insert(UserModel).values(chat_id=chat_id, **profile)
+        changes: Dict[str, Any] = {
+            field: query.excluded[field] for field in profile
+        }
+        if "photo_url" in changes:
+            changes["photo_url"] = func.coalesce(
+                query.excluded.photo_url, UserModel.photo_url,
+            )
+        # DO UPDATE even without changes, so that RETURNING gives the row
+        upsert = query.on_conflict_do_update(
+            index_elements=[UserModel.chat_id],
+            set_=changes or {"chat_id": query.excluded.chat_id},
+        ).returning(UserModel)
+
+        res = await self.session.execute(
+            upsert,
+            execution_options={"populate_existing": True},
+        )
+        user = res.scalars().one()
+        await self.session.commit()
+
+        if self.cache is not None:
+            await self.cache.invalidate(user.id)
+            await self.cache.set(user)
+        return user
 
+    async def import_users(
+        self,
+        batches: AsyncIterator[Sequence[Tuple[Any, ...]]],
+    ) -> Tuple[int, int]:
+        """
+        Bulk insert or update users.
+
+        Records are copied into a temporary staging table with COPY
+        and then merged into users with ON CONFLICT (chat_id) in one
+        statement. Cached profiles of updated users are invalidated
+        after commit.
+
+        :param batches: batches of records with IMPORT_COLUMNS values.
+        :return: numbers of inserted and updated users.
+        """
         try:
+            await self.session.execute(text(CREATE_IMPORT_TABLE))
+            connection = await self.session.connection()
+            raw_connection = await connection.get_raw_connection()
+            driver_connection = raw_connection.driver_connection
+            if driver_connection is None:
+                raise RuntimeError("Import needs a live driver connection")
+            async for batch in batches:
+                await driver_connection.copy_records_to_table(
+                    "users_import",
+                    records=batch,
+                    columns=IMPORT_COLUMNS,
+                )
+
+            res = await self.session.execute(text(MERGE_IMPORT_TABLE))
+            inserted, updated, updated_ids = res.one()
             await self.session.commit()
-            return True
-        except IntegrityError:
+        except BaseException:
             await self.session.rollback()
-            return False
+            raise
+
+        if self.cache is not None and updated_ids:
+            await self.cache.invalidate_many(updated_ids)
+        return inserted, updated
+
+    async def set_birthday(
+        self,
+        user_id: int,
+        birthday: datetime
+    ) -> UserModel | None:
+        """
+        Set birthday of user.
+
+        :param user_id: id of user.
+        :param birthday: new birthday.
+        :return: updated user or None if user doesn't exist.
+        """
+        return await self._update_user(user_id, birthday=birthday)
 
     async def update_photo(
         self,
         user_id: int,
         photo_url: str
-    ) -> bool:
-        user = await self.get_user(user_id)
-        user.photo_url = photo_url
+    ) -> UserModel | None:
+        """
+        Set photo of user.
 
-        try:
-            await self.session.commit()
-            return True
-        except IntegrityError:
-            await self.session.rollback()
-            return False
+        :param user_id: id of user.
+        :param photo_url: new photo url.
+        :return: updated user or None if user doesn't exist.
+        """
+        return await self._update_user(user_id, photo_url=photo_url)
+
+    async def _update_user(self, user_id: int, **values: Any) -> UserModel | None:
+        query = (
+            update(UserModel)
+            .where(UserModel.id == user_id)
+            .values(**values)
+            .returning(UserModel)
+        )
+        res = await self.session.execute(
+            query,
+            execution_options={"populate_existing": True},
+        )
+        user = res.scalars().first()
+        await self.session.commit()
+
+        if self.cache is not None:
+            await self.cache.invalidate(user_id)
+            if user is not None:
+                await self.cache.set(user)
+        return user
 
     async def get_user(
         self,
@@ -78,10 +298,52 @@ class UserDAO:
         chat_id: int = None,
         username: str = None
     ) -> UserModel | None:
+        """
+        Get user by id, chat id or username.
+
+        Reads through the profile cache when it is enabled. Users
+        returned from the cache are not attached to the session.
+        Without the cache the user is read from a replica. With it a
+        cache miss is read from the primary instead, because a lagging
+        replica would put a stale profile into the cache for the whole
+        TTL, while the primary only serves the misses.
+
+        :param id: id of user.
+        :param chat_id: telegram id of user.
+        :param username: username of user.
+        :return: user or None if not found.
+        """
         if id is None and chat_id is None and username is None:
             return None
 
-        query = select(UserModel)
+        if self.cache is not None:
+            cached = await self.cache.get(id, chat_id, username)
+            if cached is not None and all(
+                not value or cached[key] == value
+                for key, value in (
+                    ("id", id), ("chat_id", chat_id), ("username", username),
+                )
+            ):
+                return UserModel(**cached)
+
+        user = await self._select_user(
+            id,
+            chat_id,
+            username,
+            use_primary=self.cache is not None,
+        )
+        if user is not None and self.cache is not None:
+            await self.cache.fill(user)
+        return user
+
+    async def _select_user(
+        self,
+        id: Optional[int] = None,
+        chat_id: Optional[int] = None,
+        username: Optional[str] = None,
+        use_primary: bool = False,
+    ) -> UserModel | None:
+        query = select(UserModel).execution_options(**{USE_PRIMARY: use_primary})
         if chat_id:
             query = query.where(UserModel.chat_id == chat_id)
         if id:
@@ -92,44 +354,152 @@ class UserDAO:
         res = await self.session.execute(query)
         return res.scalars().first()
 
-    async def get_all_users(self, limit: int = None, offset: int = None) -> List[
-        UserModel]:
+    async def get_users_batch(
+        self,
+        ids: Sequence[int] = (),
+        chat_ids: Sequence[int] = (),
+        usernames: Sequence[str] = (),
+    ) -> List[Row[Any]]:
+        """
+        Get users by lists of ids, chat ids and usernames in one query.
+
+        Each list is passed as a single array parameter
+        (``= ANY(:array)``), so the statement is the same
+        for any number of keys.
+
+        :param ids: ids of users.
+        :param chat_ids: telegram ids of users.
+        :param usernames: usernames of users.
+        :return: rows of found users in no particular order.
+        """
+        conditions = []
+        if ids:
+            conditions.append(
+                UserModel.id == any_(literal(list(ids), ARRAY(Integer()))),
+            )
+        if chat_ids:
+            conditions.append(
+                UserModel.chat_id == any_(
+                    literal(list(chat_ids), ARRAY(BigInteger())),
+                ),
+            )
+        if usernames:
+            conditions.append(
+                UserModel.username == any_(
+                    literal(list(usernames), ARRAY(String())),
+                ),
+            )
+        if not conditions:
+            return []
+
+        query = select(*USER_COLUMNS).where(or_(*conditions))
+        rows = await self.session.execute(query)
+        return list(rows.all())
+
+    async def get_all_users(
+        self,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+    ) -> List[Row[Any]]:
         """
-        Get all users with limit/offset pagination.
+        Get all users with keyset pagination on id.
+
+        Every page is an index range scan on the primary key, so deep
+        pages cost the same as the first one.
 
-        :param limit: limit of dummies.
-        :param offset: offset of dummies.
-        :return: list of users.
+        :param limit: maximum number of users to return.
+        :param after_id: return only users with id greater than this one.
+        :return: rows of users ordered by id.
         """
-        q = select(UserModel).order_by(UserModel.id)
+        query = select(*USER_COLUMNS).order_by(UserModel.id)
 
-        if limit and offset:
-            q = select(UserModel).limit(limit).offset(offset)
+        if after_id is not None:
+            query = query.where(UserModel.id > after_id)
+        if limit:
+            query = query.limit(limit)
 
-        raw_users = await self.session.execute(q)
-        return list(raw_users.scalars().fetchall())
+        raw_users = await self.session.execute(query)
+        return list(raw_users.all())
+
+    async def stream_users(
+        self,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[Sequence[Row[Any]]]:
+        """
+        Stream all users in chunks from a server-side cursor.
+
+        Rows are plain column tuples, not ORM instances, so memory
+        usage depends on the chunk size only.
+
+        :param chunk_size: number of rows fetched at a time.
+        :yield: chunks of user rows ordered by id.
+        """
+        query = (
+            select(*USER_COLUMNS)
+            .order_by(UserModel.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        result = await self.session.stream(query)
+        async for partition in result.partitions():
+            yield partition
+
+    async def get_upcoming_birthdays(
+        self,
+        today: date,
+        days: int,
+        limit: Optional[int] = None,
+    ) -> List[Row[Any]]:
+        """
+        Get users whose birthday is within the next ``days`` days.
+
+        See :func:`upcoming_birthdays_query`.
+
+        :param today: first day of the window.
+        :param days: length of the window in days.
+        :param limit: maximum number of users to return.
+        :return: rows of users.
+        """
+        rows = await self.session.execute(
+            upcoming_birthdays_query(today, days, limit),
+        )
+        return list(rows.all())
 
     async def filtered_users(
         self,
-        name: Optional[str] = None
-    ) -> List[UserModel]:
+        name: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Row[Any]]:
         """
+        Search users by first name, last name or username.
+
+        Matches substrings and similar words using the pg_trgm GIN index
+        on ``search_name``; best matches come first.
+
         :param name: tg name of user.
-        :return: user models.
+        :param limit: maximum number of users to return.
+        :return: rows of users.
         """
-        query = select(UserModel)
+        query = select(*USER_COLUMNS)
 
         if name:
-            key_word = name.lower()
             query = (
                 query
                 .where(
                     or_(
-                        UserModel.first_name.ilike("%" + key_word + "%+"),
-                        UserModel.last_name.ilike("%" + key_word + "%+"),
+                        UserModel.search_name.icontains(name, autoescape=True),
+                        UserModel.search_name.op("%>")(name),
                     )
                 )
+                .order_by(
+                    func.word_similarity(name, UserModel.search_name).desc(),
+                    UserModel.id,
+                )
             )
+        else:
+            query = query.order_by(UserModel.id)
+
+        if limit:
+            query = query.limit(limit)
 
         rows = await self.session.execute(query)
-        return list(rows.scalars().fetchall())
+        return list(rows.all())
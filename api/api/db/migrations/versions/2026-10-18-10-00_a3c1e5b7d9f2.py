@@ -0,0 +1,42 @@
+"""add indexed birthday month-day column
+
+Revision ID: a3c1e5b7d9f2
+Revises: 4dfdc01b286d
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a3c1e5b7d9f2"
+down_revision = "4dfdc01b286d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column(
+            "birthday_md",
+            sa.SmallInteger(),
+            sa.Computed(
+                "(EXTRACT(MONTH FROM birthday AT TIME ZONE 'UTC') * 100"
+                " + EXTRACT(DAY FROM birthday AT TIME ZONE 'UTC'))::smallint",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        op.f("ix_users_birthday_md"),
+        "users",
+        ["birthday_md"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_users_birthday_md"), table_name="users")
+    op.drop_column("users", "birthday_md")
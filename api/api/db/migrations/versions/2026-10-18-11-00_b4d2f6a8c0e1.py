@@ -0,0 +1,45 @@
+"""add trigram index for user name search
+
+Revision ID: b4d2f6a8c0e1
+Revises: a3c1e5b7d9f2
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b4d2f6a8c0e1"
+down_revision = "a3c1e5b7d9f2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column(
+        "users",
+        sa.Column(
+            "search_name",
+            sa.Text(),
+            sa.Computed(
+                "COALESCE(first_name, '') || ' ' || COALESCE(last_name, '')"
+                " || ' ' || COALESCE(username, '')",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_users_search_name_trgm",
+        "users",
+        ["search_name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"search_name": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_search_name_trgm", table_name="users")
+    op.drop_column("users", "search_name")
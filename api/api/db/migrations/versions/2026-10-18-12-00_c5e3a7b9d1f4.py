@@ -0,0 +1,27 @@
+"""add username index
+
+Revision ID: c5e3a7b9d1f4
+Revises: b4d2f6a8c0e1
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c5e3a7b9d1f4"
+down_revision = "b4d2f6a8c0e1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        op.f("ix_users_username"),
+        "users",
+        ["username"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_users_username"), table_name="users")
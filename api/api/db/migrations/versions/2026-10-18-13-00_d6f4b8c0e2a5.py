@@ -0,0 +1,49 @@
+"""derive birthday month-day in the birthday time zone
+
+Revision ID: d6f4b8c0e2a5
+Revises: c5e3a7b9d1f4
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d6f4b8c0e2a5"
+down_revision = "c5e3a7b9d1f4"
+branch_labels = None
+depends_on = None
+
+
+def _recreate_birthday_md(timezone: str) -> None:
+    # A generated column's expression can't be altered in place.
+    local = f"birthday AT TIME ZONE '{timezone}'"
+    op.drop_index(op.f("ix_users_birthday_md"), table_name="users")
+    op.drop_column("users", "birthday_md")
+    op.add_column(
+        "users",
+        sa.Column(
+            "birthday_md",
+            sa.SmallInteger(),
+            sa.Computed(
+                f"(EXTRACT(MONTH FROM {local}) * 100"
+                f" + EXTRACT(DAY FROM {local}))::smallint",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        op.f("ix_users_birthday_md"),
+        "users",
+        ["birthday_md"],
+        unique=False,
+    )
+
+
+def upgrade() -> None:
+    _recreate_birthday_md("Europe/Moscow")
+
+
+def downgrade() -> None:
+    _recreate_birthday_md("UTC")
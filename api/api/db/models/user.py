@@ -1,16 +1,40 @@
 import enum
 from datetime import datetime
+from zoneinfo import ZoneInfo
 
 from pydantic import BaseModel
+from sqlalchemy import Computed, Index, Text, literal
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy.sql.sqltypes import BigInteger, Boolean, DateTime, Integer, String, Float
+from sqlalchemy.sql.sqltypes import (
+    BigInteger, Boolean, DateTime, Integer, SmallInteger, String, Float
+)
 
 from api.db.base import Base
-from api.settings import settings
+
+# Time zone whose calendar birthdays are celebrated in. The web app sends
+# local midnight, so birthday_md is derived in this zone. It is part of the
+# schema: changing it needs a migration that recreates birthday_md.
+BIRTHDAY_TIMEZONE = "Europe/Moscow"
+BIRTHDAY_TZ = ZoneInfo(BIRTHDAY_TIMEZONE)
+BIRTHDAY_LOCAL = "birthday AT TIME ZONE {zone}".format(
+    zone=literal(BIRTHDAY_TIMEZONE).compile(
+        dialect=postgresql.dialect(),
+        compile_kwargs={"literal_binds": True},
+    ),
+)
 
 
 class UserModel(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index(
+            "ix_users_search_name_trgm",
+            "search_name",
+            postgresql_using="gin",
+            postgresql_ops={"search_name": "gin_trgm_ops"},
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     chat_id: Mapped[int] = mapped_column(BigInteger(), unique=True)
@@ -20,9 +44,34 @@ class UserModel(Base):
     last_name: Mapped[str] = mapped_column(String(length=50), nullable=True,
                                            default="")  # noqa: WPS432
     username: Mapped[str] = mapped_column(String(length=50), nullable=True,
-                                          default="")  # noqa: WPS432
+                                          default="", index=True)  # noqa: WPS432
     birthday: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=True, default=None)
+    # Birthday as MMDD (e.g. 1231 for December 31) in the birthday time
+    # zone. Ranges over this column are contiguous within a year, so
+    # "upcoming birthdays" lookups become btree range scans instead of
+    # full table scans.
+    birthday_md: Mapped[int] = mapped_column(
+        SmallInteger(),
+        Computed(
+            f"(EXTRACT(MONTH FROM {BIRTHDAY_LOCAL}) * 100"
+            f" + EXTRACT(DAY FROM {BIRTHDAY_LOCAL}))::smallint",
+            persisted=True,
+        ),
+        nullable=True,
+        index=True,
+    )
+    # Names and username in one string for trigram search,
+    # see ix_users_search_name_trgm below.
+    search_name: Mapped[str] = mapped_column(
+        Text(),
+        Computed(
+            "COALESCE(first_name, '') || ' ' || COALESCE(last_name, '')"
+            " || ' ' || COALESCE(username, '')",
+            persisted=True,
+        ),
+        nullable=True,
+    )
     photo_url: Mapped[str] = mapped_column(String(length=50),
                                            nullable=True, default=None)
 
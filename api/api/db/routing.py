@@ -0,0 +1,167 @@
+import asyncio
+import itertools
+import logging
+from typing import Any, Optional, Sequence, Union
+
+from sqlalchemy import Select, event, text
+from sqlalchemy.engine import Connection, Engine, ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Session.info keys
+PINNED_TO_PRIMARY = "pinned_to_primary"
+REPLICA = "replica"
+# Execution option of a SELECT that must not read a lagging replica
+USE_PRIMARY = "use_primary"
+
+
+class ReplicaSet:
+    """
+    Read replicas picked round-robin.
+
+    A replica is ejected when one of its connections is lost and
+    when it fails a health check, and is taken back after it passes
+    the next one. With no healthy replica reads go to the primary.
+    """
+
+    def __init__(
+        self,
+        engines: Sequence[AsyncEngine],
+        check_interval: float,
+        check_timeout: float,
+    ):
+        self.engines = list(engines)
+        self.healthy = [True] * len(self.engines)
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self._order = itertools.cycle(range(len(self.engines)))
+        for index, engine in enumerate(self.engines):
+            event.listen(
+                engine.sync_engine,
+                "handle_error",
+                self._error_listener(index),
+            )
+
+    def _error_listener(self, index: int) -> Any:
+        def on_error(context: ExceptionContext) -> None:  # noqa: WPS430
+            if context.is_disconnect:
+                self.eject(index, context.original_exception)
+
+        return on_error
+
+    def eject(self, index: int, error: Any) -> None:
+        """
+        Stop sending reads to a replica until it passes a health check.
+
+        :param index: index of the replica.
+        :param error: reason of the ejection.
+        """
+        if self.healthy[index]:
+            logger.warning("Replica %s is ejected: %s", index, error)
+        self.healthy[index] = False
+
+    def pick(self) -> Optional[AsyncEngine]:
+        """
+        Get the next healthy replica.
+
+        :return: replica engine or None if no replica is healthy.
+        """
+        for _ in self.engines:
+            index = next(self._order)
+            if self.healthy[index]:
+                return self.engines[index]
+        return None
+
+    async def _check(self, index: int) -> None:
+        async def _select() -> None:  # noqa: WPS430
+            async with self.engines[index].connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        try:
+            await asyncio.wait_for(_select(), self.check_timeout)
+        except Exception as exc:
+            self.eject(index, repr(exc))
+        else:
+            if not self.healthy[index]:
+                logger.info("Replica %s is back", index)
+            self.healthy[index] = True
+
+    async def check(self) -> None:
+        """Check all replicas concurrently."""
+        await asyncio.gather(
+            *(self._check(index) for index in range(len(self.engines))),
+        )
+
+    async def run(self) -> None:
+        """Check the replicas forever."""
+        while True:  # noqa: WPS457
+            await asyncio.sleep(self.check_interval)
+            await self.check()
+
+    async def dispose(self) -> None:
+        """Close connections of all replicas."""
+        await asyncio.gather(*(engine.dispose() for engine in self.engines))
+
+
+class RoutingSession(Session):
+    """
+    Session that sends plain reads to a replica.
+
+    SELECT statements go to one replica picked for the whole session.
+    Everything else (writes, flushes, SELECT ... FOR UPDATE, text
+    statements and raw connections) goes to the primary and pins the
+    session to it, so data written in a request is read back from
+    the primary for the rest of that request. A SELECT with the
+    ``USE_PRIMARY`` execution option goes to the primary without
+    pinning the session.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        replicas: Optional[ReplicaSet] = None,
+        **kwargs: Any,
+    ):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+
+    def get_bind(  # type: ignore[override]
+        self,
+        mapper: Any = None,
+        clause: Any = None,
+        **kwargs: Any,
+    ) -> Union[Engine, Connection]:
+        """
+        Choose the engine for a statement.
+
+        :param mapper: mapper of the statement.
+        :param clause: statement to execute.
+        :param kwargs: other arguments of Session.get_bind.
+        :return: sync engine or connection to execute the statement on.
+        """
+        primary = super().get_bind(mapper, clause=clause, **kwargs)
+        if self.replicas is None or not self.replicas.engines:
+            return primary
+        if self.info.get(PINNED_TO_PRIMARY):
+            return primary
+        is_read = (
+            isinstance(clause, Select)
+            and clause._for_update_arg is None  # noqa: WPS437
+            and not self._flushing
+        )
+        if not is_read:
+            self.info[PINNED_TO_PRIMARY] = True
+            return primary
+        if clause.get_execution_options().get(USE_PRIMARY):
+            return primary
+
+        replica: Optional[AsyncEngine] = self.info.get(REPLICA)
+        if replica is None:
+            replica = self.replicas.pick()
+            if replica is None:
+                return primary
+            self.info[REPLICA] = replica
+        return replica.sync_engine
+
@@ -1,6 +1,9 @@
+import os
 from typing import Any
 
 from gunicorn.app.base import BaseApplication
+from gunicorn.arbiter import Arbiter
+from gunicorn.workers.base import Worker
 from gunicorn.util import import_app
 from uvicorn.workers import UvicornWorker as BaseUvicornWorker
 
@@ -28,6 +31,20 @@ class UvicornWorker(BaseUvicornWorker):
     }
 
 
+def child_exit(server: Arbiter, worker: Worker) -> None:
+    """
+    Drops live metrics of a stopped worker.
+
+    :param server: gunicorn arbiter.
+    :param worker: worker that exited.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Imported late: prometheus_client picks its storage on import.
+        from prometheus_client import multiprocess  # noqa: WPS433
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
 class GunicornApplication(BaseApplication):
     """
     Custom gunicorn application.
@@ -48,6 +65,7 @@ class GunicornApplication(BaseApplication):
             "bind": f"{host}:{port}",
             "workers": workers,
             "worker_class": "api.gunicorn_runner.UvicornWorker",
+            "child_exit": child_exit,
             **kwargs,
         }
         self.app = app
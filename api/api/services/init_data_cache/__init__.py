@@ -0,0 +1 @@
+"""Cache of verified Telegram WebApp init data."""
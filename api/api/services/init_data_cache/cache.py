@@ -0,0 +1,114 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from redis.asyncio import ConnectionPool, Redis
+
+REDIS_KEY_PREFIX = "init_data:"
+
+
+class InitDataCache:
+    """
+    Bounded TTL cache of already verified init data.
+
+    Maps init data to the Telegram user it was signed for, so repeated
+    validations of the same init data skip parsing and HMAC checks.
+    Entries live in an in-process LRU and, optionally, in Redis
+    to share them between workers.
+    """
+
+    def __init__(self, maxsize: int, ttl: int, use_redis: bool = False):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+
+    async def get(
+        self,
+        init_data: str,
+        redis_pool: Optional[ConnectionPool] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get telegram user for already verified init data.
+
+        :param init_data: raw init data from the web app.
+        :param redis_pool: redis connection pool.
+        :return: telegram user or None if init data is not cached.
+        """
+        key = self._make_key(init_data)
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, telegram_user = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                return telegram_user
+            del self._entries[key]  # noqa: WPS420
+
+        if not self.use_redis or redis_pool is None:
+            return None
+
+        async with Redis(connection_pool=redis_pool) as redis:
+            raw_value = await redis.get(REDIS_KEY_PREFIX + key)
+        if raw_value is None:
+            return None
+
+        expires_at, telegram_user = json.loads(raw_value)
+        if expires_at <= time.time():
+            return None
+        self._store(key, expires_at, telegram_user)
+        return telegram_user
+
+    async def set(
+        self,
+        init_data: str,
+        telegram_user: Dict[str, Any],
+        auth_expires_at: Optional[float] = None,
+        redis_pool: Optional[ConnectionPool] = None,
+    ) -> None:
+        """
+        Remember verified init data.
+
+        The entry expires after the cache TTL or when init data itself
+        expires, whichever comes first.
+
+        :param init_data: raw init data from the web app.
+        :param telegram_user: telegram user the init data was signed for.
+        :param auth_expires_at: unix time when init data expires.
+        :param redis_pool: redis connection pool.
+        """
+        now = time.time()
+        expires_at = now + self.ttl
+        if auth_expires_at is not None:
+            expires_at = min(expires_at, auth_expires_at)
+        if expires_at <= now or self.maxsize <= 0:
+            return
+
+        key = self._make_key(init_data)
+        self._store(key, expires_at, telegram_user)
+
+        if self.use_redis and redis_pool is not None:
+            async with Redis(connection_pool=redis_pool) as redis:
+                await redis.set(
+                    name=REDIS_KEY_PREFIX + key,
+                    value=json.dumps([expires_at, telegram_user]),
+                    ex=max(int(expires_at - now), 1),
+                )
+
+    def _store(
+        self,
+        key: str,
+        expires_at: float,
+        telegram_user: Dict[str, Any],
+    ) -> None:
+        self._entries[key] = (expires_at, telegram_user)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _make_key(init_data: str) -> str:
+        return hashlib.sha256(init_data.encode()).hexdigest()
@@ -0,0 +1,13 @@
+from starlette.requests import Request
+
+from api.services.init_data_cache.cache import InitDataCache
+
+
+def get_init_data_cache(request: Request) -> InitDataCache:  # pragma: no cover
+    """
+    Returns cache of verified init data.
+
+    :param request: current request.
+    :returns: init data cache.
+    """
+    return request.app.state.init_data_cache
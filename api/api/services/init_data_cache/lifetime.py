@@ -0,0 +1,17 @@
+from fastapi import FastAPI
+
+from api.services.init_data_cache.cache import InitDataCache
+from api.settings import settings
+
+
+def init_init_data_cache(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Creates cache of verified init data.
+
+    :param app: current fastapi application.
+    """
+    app.state.init_data_cache = InitDataCache(
+        maxsize=settings.init_data_cache_size,
+        ttl=settings.init_data_cache_ttl,
+        use_redis=settings.init_data_cache_redis,
+    )
@@ -0,0 +1 @@
+"""Prometheus metrics of the application."""
@@ -0,0 +1,37 @@
+import asyncio
+from contextlib import suppress
+
+from fastapi import FastAPI
+
+from api.services.metrics.metrics import refresh_pool_metrics
+
+REFRESH_INTERVAL = 5
+
+
+async def _refresh_pool_metrics(app: FastAPI) -> None:
+    while True:  # noqa: WPS457
+        refresh_pool_metrics(app)
+        await asyncio.sleep(REFRESH_INTERVAL)
+
+
+def init_metrics(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Starts periodic refresh of pool gauges.
+
+    Every gunicorn worker refreshes its own gauges, so the
+    aggregated values stay current whichever worker is scraped.
+
+    :param app: current fastapi application.
+    """
+    app.state.metrics_task = asyncio.create_task(_refresh_pool_metrics(app))
+
+
+async def shutdown_metrics(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Stops refreshing pool gauges.
+
+    :param app: current fastapi application.
+    """
+    app.state.metrics_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await app.state.metrics_task
@@ -0,0 +1,86 @@
+import os
+
+from fastapi import FastAPI
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    REGISTRY,
+)
+
+REQUEST_LATENCY = Histogram(
+    "api_request_duration_seconds",
+    "Latency of HTTP requests.",
+    ["method", "route", "status"],
+)
+DB_POOL_WAIT = Histogram(
+    "api_db_pool_wait_seconds",
+    "Time spent waiting for a database connection from the pool.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_POOL_SIZE = Gauge(
+    "api_db_pool_size",
+    "Configured size of the database pool.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "api_db_pool_checked_out",
+    "Database connections currently in use.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "api_db_pool_overflow",
+    "Database connections opened above the pool size.",
+    multiprocess_mode="livesum",
+)
+REDIS_POOL_CREATED = Gauge(
+    "api_redis_pool_created_connections",
+    "Connections opened by the redis pool.",
+    multiprocess_mode="livesum",
+)
+REDIS_POOL_IN_USE = Gauge(
+    "api_redis_pool_in_use_connections",
+    "Redis connections currently in use.",
+    multiprocess_mode="livesum",
+)
+
+
+def refresh_pool_metrics(app: FastAPI) -> None:
+    """
+    Copy current pool usage into the gauges.
+
+    :param app: current fastapi application.
+    """
+    engine = getattr(app.state, "db_engine", None)
+    if engine is not None:
+        pool = engine.pool
+        # Pools without a size (NullPool) keep no connections to report.
+        if hasattr(pool, "size"):  # noqa: WPS421
+            DB_POOL_SIZE.set(pool.size())
+            DB_POOL_CHECKED_OUT.set(pool.checkedout())
+            DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+    redis_pool = getattr(app.state, "redis_pool", None)
+    if redis_pool is not None:
+        REDIS_POOL_CREATED.set(redis_pool._created_connections)  # noqa: WPS437
+        REDIS_POOL_IN_USE.set(len(redis_pool._in_use_connections))  # noqa: WPS437
+
+
+def render_metrics() -> bytes:
+    """
+    Render all metrics in the prometheus text format.
+
+    Under gunicorn every worker writes its samples to
+    PROMETHEUS_MULTIPROC_DIR and they are summed here.
+
+    :return: metrics exposition.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
+
@@ -0,0 +1 @@
+"""Readiness probes of the application dependencies."""
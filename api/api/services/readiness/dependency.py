@@ -0,0 +1,13 @@
+from starlette.requests import Request
+
+from api.services.readiness.probe import ReadinessProbe
+
+
+def get_readiness_probe(request: Request) -> ReadinessProbe:  # pragma: no cover
+    """
+    Returns readiness probe of the application.
+
+    :param request: current request.
+    :returns: readiness probe.
+    """
+    return request.app.state.readiness_probe
@@ -0,0 +1,37 @@
+import asyncio
+from contextlib import suppress
+
+from fastapi import FastAPI
+
+from api.services.readiness.probe import ReadinessProbe
+from api.settings import settings
+
+
+async def init_readiness(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Runs the first dependency check and starts refreshing it.
+
+    Must run after the database and Redis pools are created.
+
+    :param app: current fastapi application.
+    """
+    probe = ReadinessProbe(
+        engine=app.state.db_engine,
+        redis_pool=app.state.redis_pool,
+        interval=settings.readiness_interval,
+        timeout=settings.readiness_timeout,
+    )
+    await probe.refresh()
+    app.state.readiness_probe = probe
+    app.state.readiness_task = asyncio.create_task(probe.run())
+
+
+async def shutdown_readiness(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Stops refreshing dependency checks.
+
+    :param app: current fastapi application.
+    """
+    app.state.readiness_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await app.state.readiness_task
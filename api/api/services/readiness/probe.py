@@ -0,0 +1,80 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from redis.asyncio import ConnectionPool, Redis
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class ReadinessProbe:
+    """
+    Cached health of the database and Redis.
+
+    Dependencies are checked by a background loop every ``interval``
+    seconds; readiness requests only read the last results, so the probe
+    rate of an orchestrator never reaches Postgres or Redis.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        redis_pool: ConnectionPool,
+        interval: float,
+        timeout: float,
+    ):
+        self.engine = engine
+        self.redis_pool = redis_pool
+        self.interval = interval
+        self.timeout = timeout
+        self.checked_at = 0.0
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    async def _check_db(self) -> None:
+        async with self.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def _check_redis(self) -> None:
+        async with Redis(connection_pool=self.redis_pool) as redis:
+            await redis.ping()
+
+    async def _probe(self, check: Callable[[], Awaitable[None]]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        error = None
+        try:
+            await asyncio.wait_for(check(), self.timeout)
+        except Exception as exc:
+            error = repr(exc)
+        return {
+            "ok": error is None,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+            "error": error,
+        }
+
+    async def refresh(self) -> None:
+        """Check all dependencies concurrently and store the results."""
+        db, redis = await asyncio.gather(
+            self._probe(self._check_db),
+            self._probe(self._check_redis),
+        )
+        self.results = {"db": db, "redis": redis}
+        self.checked_at = time.monotonic()
+
+    async def run(self) -> None:
+        """Refresh the results forever."""
+        while True:  # noqa: WPS457
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+    @property
+    def ready(self) -> bool:
+        """
+        Whether every dependency passed its last check.
+
+        Results older than three intervals mean the loop is stuck,
+        which is reported as not ready.
+
+        :return: readiness of the application.
+        """
+        fresh = time.monotonic() - self.checked_at < self.interval * 3
+        return fresh and all(result["ok"] for result in self.results.values())
@@ -0,0 +1 @@
+"""Redis cache of user profiles."""
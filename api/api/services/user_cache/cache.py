@@ -0,0 +1,263 @@
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError, WatchError
+
+from api.db.models.user import UserModel
+from api.settings import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "user:"
+LOOKUPS_KEY = "user_cache:lookups"
+MISSES_KEY = "user_cache:misses"
+INVALIDATE_CHUNK_SIZE = 1000
+# Read-through fills are skipped for this many seconds after a user
+# is invalidated, so a row read before a write isn't cached after it
+INVALIDATED_PREFIX = "user_cache:invalidated:"
+INVALIDATED_TTL = 10
+
+
+class UserCache:
+    """
+    Read-through cache of user profiles in Redis.
+
+    Every profile is stored under its id, chat id and username keys
+    as a compact JSON array of column values. Redis errors are logged
+    and treated as cache misses, so the database stays the source of truth.
+    """
+
+    def __init__(self, redis_pool: ConnectionPool, ttl: Optional[int] = None):
+        self.redis_pool = redis_pool
+        self.ttl = settings.user_cache_ttl if ttl is None else ttl
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether caching is turned on.
+
+        :return: True if TTL is positive.
+        """
+        return self.ttl > 0
+
+    async def get(
+        self,
+        id: Optional[int] = None,
+        chat_id: Optional[int] = None,
+        username: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get cached profile by the first given key.
+
+        :param id: id of user.
+        :param chat_id: telegram id of user.
+        :param username: username of user.
+        :return: user columns or None on cache miss.
+        """
+        key = self._lookup_key(id, chat_id, username)
+        if key is None:
+            return None
+
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                async with redis.pipeline(transaction=False) as pipe:
+                    pipe.get(key)
+                    pipe.incr(LOOKUPS_KEY)
+                    raw_value, _ = await pipe.execute()
+                if raw_value is None:
+                    await redis.incr(MISSES_KEY)
+        except RedisError as exc:
+            logger.warning("User cache is unavailable: %s", exc)
+            return None
+
+        if raw_value is None:
+            return None
+        return self.loads(raw_value)
+
+    async def set(self, user: UserModel) -> None:
+        """
+        Put profile into the cache under all of its keys.
+
+        :param user: user to cache.
+        """
+        value = self.dumps(user)
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                async with redis.pipeline(transaction=False) as pipe:
+                    for key in self._keys(user.id, user.chat_id, user.username):
+                        pipe.set(key, value, ex=self.ttl)
+                    await pipe.execute()
+        except RedisError as exc:
+            logger.warning("User cache is unavailable: %s", exc)
+
+    async def fill(self, user: UserModel) -> None:
+        """
+        Put profile read from the database on a cache miss.
+
+        Unlike :meth:`set` it does nothing if the user was invalidated
+        recently: the profile may have been read before that write
+        and would be stale for the whole TTL.
+
+        :param user: user to cache.
+        """
+        value = self.dumps(user)
+        invalidated_key = f"{INVALIDATED_PREFIX}{user.id}"
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                async with redis.pipeline() as pipe:
+                    await pipe.watch(invalidated_key)
+                    if await pipe.exists(invalidated_key):
+                        return
+                    pipe.multi()
+                    for key in self._keys(user.id, user.chat_id, user.username):
+                        pipe.set(key, value, ex=self.ttl)
+                    await pipe.execute()
+        except WatchError:
+            return
+        except RedisError as exc:
+            logger.warning("User cache is unavailable: %s", exc)
+
+    async def invalidate(self, user_id: int) -> None:
+        """
+        Drop cached profile of the user under all of its keys.
+
+        The cached profile itself is used to find chat id and username
+        keys, so stale entries under an old username are dropped too.
+
+        :param user_id: id of user.
+        """
+        await self.invalidate_many([user_id])
+
+    async def invalidate_many(self, user_ids: Sequence[int]) -> None:
+        """
+        Drop cached profiles of many users, like :meth:`invalidate`.
+
+        Profiles are looked up and dropped with two round trips
+        per chunk of INVALIDATE_CHUNK_SIZE users. The users are also
+        marked as invalidated for INVALIDATED_TTL seconds, see :meth:`fill`.
+
+        :param user_ids: ids of users.
+        """
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                for start in range(0, len(user_ids), INVALIDATE_CHUNK_SIZE):
+                    chunk = user_ids[start:start + INVALIDATE_CHUNK_SIZE]
+                    keys = [f"{KEY_PREFIX}id:{user_id}" for user_id in chunk]
+                    for raw_value in await redis.mget(keys):
+                        if raw_value is not None:
+                            cached = self.loads(raw_value)
+                            keys.extend(
+                                self._keys(
+                                    cached["id"],
+                                    cached["chat_id"],
+                                    cached["username"],
+                                ),
+                            )
+                    async with redis.pipeline() as pipe:
+                        pipe.delete(*keys)
+                        for user_id in chunk:
+                            pipe.set(
+                                f"{INVALIDATED_PREFIX}{user_id}",
+                                1,
+                                ex=INVALIDATED_TTL,
+                            )
+                        await pipe.execute()
+        except RedisError as exc:
+            logger.warning("Failed to invalidate users %s: %s", user_ids[:10], exc)
+
+    async def get_stats(self) -> Dict[str, int]:
+        """
+        Get hit and miss counters shared by all workers.
+
+        :return: numbers of cache hits and misses, zeros if Redis
+            is unavailable.
+        """
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                lookups, misses = await redis.mget(LOOKUPS_KEY, MISSES_KEY)
+        except RedisError as exc:
+            logger.warning("User cache is unavailable: %s", exc)
+            return {"hits": 0, "misses": 0}
+        lookups, misses = int(lookups or 0), int(misses or 0)
+        return {"hits": lookups - misses, "misses": misses}
+
+    @staticmethod
+    def dumps(user: UserModel) -> str:
+        """
+        Serialize user into a compact JSON array.
+
+        :param user: user to serialize.
+        :return: serialized user.
+        """
+        return json.dumps(
+            [
+                user.id,
+                user.chat_id,
+                user.first_name,
+                user.last_name,
+                user.username,
+                user.birthday.isoformat() if user.birthday else None,
+                user.photo_url,
+                user.date_started.isoformat() if user.date_started else None,
+            ],
+            separators=(",", ":"),
+        )
+
+    @staticmethod
+    def loads(raw_value: bytes | str) -> Dict[str, Any]:
+        """
+        Deserialize user columns from a JSON array.
+
+        :param raw_value: value stored by dumps.
+        :return: user columns.
+        """
+        (
+            id,
+            chat_id,
+            first_name,
+            last_name,
+            username,
+            birthday,
+            photo_url,
+            date_started,
+        ) = json.loads(raw_value)
+        return {
+            "id": id,
+            "chat_id": chat_id,
+            "first_name": first_name,
+            "last_name": last_name,
+            "username": username,
+            "birthday": datetime.fromisoformat(birthday) if birthday else None,
+            "photo_url": photo_url,
+            "date_started": (
+                datetime.fromisoformat(date_started) if date_started else None
+            ),
+        }
+
+    @staticmethod
+    def _lookup_key(
+        id: Optional[int],
+        chat_id: Optional[int],
+        username: Optional[str],
+    ) -> Optional[str]:
+        if id:
+            return f"{KEY_PREFIX}id:{id}"
+        if chat_id:
+            return f"{KEY_PREFIX}chat_id:{chat_id}"
+        if username:
+            return f"{KEY_PREFIX}username:{username}"
+        return None
+
+    @staticmethod
+    def _keys(
+        id: int,
+        chat_id: Optional[int],
+        username: Optional[str],
+    ) -> List[str]:
+        keys = [f"{KEY_PREFIX}id:{id}", f"{KEY_PREFIX}chat_id:{chat_id}"]
+        if username:
+            keys.append(f"{KEY_PREFIX}username:{username}")
+        return keys
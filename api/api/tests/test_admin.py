@@ -0,0 +1,154 @@
+from typing import Dict
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.db.models.user import UserModel
+from api.settings import settings
+from api.web.auth_bearer import sign_jwt
+
+
+def auth(admin: bool = True) -> Dict[str, str]:
+    """
+    Authorization header with a signed token.
+
+    :param admin: whether the token has the admin claim.
+    :return: headers.
+    """
+    return {"Authorization": f"Bearer {sign_jwt('1', admin=admin)}"}
+
+
+@pytest.fixture
+def jwt_secret(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Replace the default JWT secret, which disables the admin API."""
+    monkeypatch.setattr(settings, "jwt_secret", "test-secret-" + "x" * 32)
+
+
+@pytest.mark.anyio
+async def test_admin_disabled_with_default_secret(client: AsyncClient) -> None:
+    """Checks that admin endpoints refuse to work with the default secret."""
+    response = await client.get(
+        "/api/admin/users/export",
+        headers={"Authorization": "Bearer any"},
+    )
+
+    assert response.status_code == 503
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("jwt_secret")
+async def test_admin_requires_admin_claim(client: AsyncClient) -> None:
+    """Checks that a valid token without the admin claim is rejected."""
+    response = await client.get("/api/admin/users/export", headers=auth(admin=False))
+
+    assert response.status_code == 403
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("jwt_secret")
+async def test_admin_export(client: AsyncClient) -> None:
+    """Checks that an admin token can export users."""
+    await client.put("/api/user", json={"chat_id": 201, "first_name": "Eve"})
+
+    response = await client.get("/api/admin/users/export", headers=auth())
+
+    assert response.status_code == 200
+    assert '"chat_id":201' in response.text.replace(" ", "")
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("jwt_secret")
+async def test_import_invalidates_cached_profiles(client: AsyncClient) -> None:
+    """Checks that imported changes are visible through the profile cache."""
+    await client.put("/api/user", json={"chat_id": 202, "first_name": "F0"})
+    cached = await client.get("/api/user", params={"chat_id": 202})
+    assert cached.json()["first_name"] == "F0"
+
+    await client.post(
+        "/api/admin/users/import",
+        content=b'{"chat_id": 202, "first_name": "Imp"}\n',
+        headers=auth(),
+    )
+
+    response = await client.get("/api/user", params={"chat_id": 202})
+    assert response.json()["first_name"] == "Imp"
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("jwt_secret")
+async def test_import_csv_with_newlines_in_quotes(client: AsyncClient) -> None:
+    """Checks that quoted CSV fields may span lines."""
+    body = b'chat_id,first_name,last_name\n203,"Two\nlines",Lee\n204,Zoe,"A, B"\n'
+
+    response = await client.post(
+        "/api/admin/users/import",
+        params={"format": "csv"},
+        content=body,
+        headers=auth(),
+    )
+
+    assert response.json()["inserted"] == 2
+    assert response.json()["rejected"] == 0
+    first = await client.get("/api/user", params={"chat_id": 203})
+    assert first.json()["first_name"] == "Two\nlines"
+    second = await client.get("/api/user", params={"chat_id": 204})
+    assert second.json()["last_name"] == "A, B"
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("jwt_secret")
+async def test_import_rejects_invalid_utf8(client: AsyncClient) -> None:
+    """Checks that a body that isn't UTF-8 is a client error."""
+    response = await client.post(
+        "/api/admin/users/import",
+        content=b'{"chat_id": 205, "first_name": "\xff"}\n',
+        headers=auth(),
+    )
+
+    assert response.status_code == 400
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("jwt_secret")
+async def test_import_rejects_invalid_chat_ids(client: AsyncClient) -> None:
+    """Checks that bad chat ids reject their rows, not the whole import."""
+    body = b"\n".join(
+        [
+            b'{"chat_id": true}',
+            b'{"chat_id": 206.5}',
+            b'{"chat_id": 9223372036854775808}',
+            b'{"chat_id": "-9223372036854775809"}',
+            b'{"chat_id": 206, "first_name": "Ok"}',
+        ],
+    )
+
+    response = await client.post(
+        "/api/admin/users/import",
+        content=body,
+        headers=auth(),
+    )
+
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 1
+    assert response.json()["rejected"] == 4
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("jwt_secret")
+async def test_import_reads_naive_birthday_in_birthday_zone(
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Checks that a birthday without a zone keeps its calendar day."""
+    await client.post(
+        "/api/admin/users/import",
+        content=b'{"chat_id": 207, "birthday": "1990-10-19T23:30:00"}\n',
+        headers=auth(),
+    )
+
+    birthday_md = await dbsession.scalar(
+        select(UserModel.birthday_md).where(UserModel.chat_id == 207),
+    )
+    assert birthday_md == 1019
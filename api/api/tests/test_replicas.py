@@ -0,0 +1,96 @@
+from typing import AsyncGenerator
+
+import pytest
+from redis.asyncio import ConnectionPool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from api.db.dao.user_dao import UserDAO
+from api.db.models.user import UserModel
+from api.db.routing import PINNED_TO_PRIMARY, USE_PRIMARY, ReplicaSet, RoutingSession
+from api.services.user_cache.cache import UserCache
+from api.settings import settings
+
+
+@pytest.fixture
+async def replicas() -> AsyncGenerator[ReplicaSet, None]:
+    """
+    Get a replica that lags behind the test transaction.
+
+    The replica is a separate engine of the test database, so it doesn't
+    see rows written by the test, which are never committed.
+
+    :yield: replica set.
+    """
+    replica_set = ReplicaSet(
+        [create_async_engine(str(settings.db_url))],
+        check_interval=1,
+        check_timeout=1,
+    )
+
+    yield replica_set
+
+    await replica_set.dispose()
+
+
+@pytest.fixture
+async def routing_session(
+    dbsession: AsyncSession,
+    replicas: ReplicaSet,
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Get a routing session over the test transaction.
+
+    :param dbsession: session of the test transaction.
+    :param replicas: replica set.
+    :yield: session that sends reads to the replica.
+    """
+    session_maker = async_sessionmaker(
+        dbsession.bind,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+        sync_session_class=RoutingSession,
+        replicas=replicas,
+    )
+    session = session_maker()
+
+    yield session
+
+    await session.close()
+
+
+@pytest.mark.anyio
+async def test_use_primary_does_not_pin(
+    routing_session: AsyncSession,
+    replicas: ReplicaSet,
+) -> None:
+    """Checks that a SELECT can go to the primary without pinning the session."""
+    sync_session = routing_session.sync_session
+    replica = replicas.engines[0].sync_engine
+    query = select(UserModel)
+
+    assert sync_session.get_bind(clause=query) is replica
+
+    primary_query = query.execution_options(**{USE_PRIMARY: True})
+    assert sync_session.get_bind(clause=primary_query) is not replica
+    assert not sync_session.info.get(PINNED_TO_PRIMARY)
+
+
+@pytest.mark.anyio
+async def test_cache_miss_reads_primary(
+    dbsession: AsyncSession,
+    routing_session: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Checks that a cache miss doesn't cache what a lagging replica returns."""
+    dbsession.add(UserModel(chat_id=401, first_name="New"))
+    await dbsession.flush()
+    dao = UserDAO(routing_session, fake_redis_pool)
+
+    user = await dao.get_user(chat_id=401)
+
+    assert user is not None
+    assert user.first_name == "New"
+    cached = await UserCache(fake_redis_pool).get(chat_id=401)
+    assert cached is not None
+    assert cached["first_name"] == "New"
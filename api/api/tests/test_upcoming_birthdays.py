@@ -0,0 +1,89 @@
+from datetime import date, datetime, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import Select, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.db.dao.user_dao import upcoming_birthdays_query
+from api.db.models.user import BIRTHDAY_TZ, UserModel
+from api.web.api.user.views import days_until_birthday
+
+
+async def _explain(
+    dbsession: AsyncSession,
+    query: Select,  # type: ignore[type-arg]
+) -> str:
+    sql = query.compile(
+        dialect=postgresql.dialect(),
+        compile_kwargs={"literal_binds": True},
+    )
+    # The test table is tiny, a sequential scan would always win.
+    await dbsession.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = await dbsession.execute(text(f"EXPLAIN {sql}"))
+    return "\n".join(row[0] for row in plan)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "today",
+    [date(2026, 6, 1), date(2026, 12, 28)],
+    ids=["within-year", "across-new-year"],
+)
+async def test_upcoming_birthdays_use_index(
+    dbsession: AsyncSession,
+    today: date,
+) -> None:
+    """Checks that the upcoming birthdays lookup scans ix_users_birthday_md."""
+    plan = await _explain(dbsession, upcoming_birthdays_query(today, 7, 100))
+
+    assert "ix_users_birthday_md" in plan
+
+
+@pytest.mark.anyio
+async def test_birthday_keeps_local_calendar_day(
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Checks that local midnight sent by the web app stays on its day."""
+    local_midnight = datetime(1990, 10, 19, tzinfo=BIRTHDAY_TZ)
+    response = await client.put("/api/user", json={"chat_id": 4001})
+    user_id = response.json()["id"]
+
+    response = await client.post(
+        "/api/user/birthday",
+        json={
+            "user_id": user_id,
+            "birthday": local_midnight.astimezone(timezone.utc).isoformat(),
+        },
+    )
+
+    assert response.json()["result"]
+    birthday_md = await dbsession.scalar(
+        select(UserModel.birthday_md).where(UserModel.id == user_id),
+    )
+    assert birthday_md == 1019
+    assert days_until_birthday(local_midnight, date(2026, 10, 19)) == 0
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("today", "found"),
+    [(date(2027, 3, 1), True), (date(2028, 3, 1), False)],
+    ids=["common-year", "leap-year"],
+)
+async def test_leap_day_birthday_on_march_first(
+    dbsession: AsyncSession,
+    today: date,
+    found: bool,
+) -> None:
+    """Checks that Feb 29 birthdays are upcoming on Mar 1 of common years."""
+    dbsession.add(
+        UserModel(chat_id=4002, birthday=datetime(2000, 2, 29, tzinfo=timezone.utc)),
+    )
+    await dbsession.flush()
+
+    rows = await dbsession.execute(upcoming_birthdays_query(today, 0))
+
+    assert (4002 in {row.chat_id for row in rows}) is found
@@ -0,0 +1,60 @@
+import pytest
+from redis.asyncio import ConnectionPool
+
+from api.db.models.user import UserModel
+from api.services.user_cache.cache import UserCache
+
+
+@pytest.mark.anyio
+async def test_fill_after_invalidation_is_skipped(
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Checks that a row read before a write isn't cached after it."""
+    cache = UserCache(fake_redis_pool, ttl=60)
+    stale = UserModel(id=501, chat_id=501, first_name="Old")
+
+    await cache.invalidate(stale.id)
+    await cache.fill(stale)
+
+    assert await cache.get(chat_id=501) is None
+
+
+@pytest.mark.anyio
+async def test_set_after_invalidation_is_cached(
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Checks that the writer still caches the row it has just written."""
+    cache = UserCache(fake_redis_pool, ttl=60)
+    user = UserModel(id=502, chat_id=502, first_name="New")
+
+    await cache.invalidate(user.id)
+    await cache.set(user)
+
+    cached = await cache.get(chat_id=502)
+    assert cached is not None
+    assert cached["first_name"] == "New"
+
+
+@pytest.mark.anyio
+async def test_fill_without_invalidation_is_cached(
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Checks that a cache miss fills the cache."""
+    cache = UserCache(fake_redis_pool, ttl=60)
+
+    await cache.fill(UserModel(id=503, chat_id=503, username="someone"))
+
+    cached = await cache.get(username="someone")
+    assert cached is not None
+    assert cached["id"] == 503
+
+
+@pytest.mark.anyio
+async def test_stats_without_redis() -> None:
+    """Checks that cache stats don't fail when Redis is unavailable."""
+    pool = ConnectionPool(host="127.0.0.1", port=1)
+
+    stats = await UserCache(pool).get_stats()
+
+    assert stats == {"hits": 0, "misses": 0}
+    await pool.disconnect()
@@ -0,0 +1,73 @@
+import hmac
+import json
+import time
+from hashlib import sha256
+from typing import Any, List
+from urllib.parse import quote
+
+import pytest
+from httpx import AsyncClient
+
+from api.db.dao.user_dao import UserDAO
+from api.settings import settings
+from api.web.api.user.views import get_secret_key
+
+
+def make_init_data(telegram_user: dict) -> str:  # type: ignore[type-arg]
+    """
+    Sign init data for a user the way Telegram does.
+
+    :param telegram_user: user to sign init data for.
+    :return: init data string.
+    """
+    fields = {"auth_date": str(int(time.time())), "user": json.dumps(telegram_user)}
+    data_check_string = "\n".join(
+        f"{key}={value}" for key, value in sorted(fields.items())
+    )
+    fields["hash"] = hmac.new(
+        get_secret_key(settings.bot_token),
+        data_check_string.encode(),
+        sha256,
+    ).hexdigest()
+    return "&".join(f"{key}={quote(value)}" for key, value in fields.items())
+
+
+@pytest.mark.anyio
+async def test_put_keeps_missing_fields(client: AsyncClient) -> None:
+    """Checks that PUT /api/user doesn't clear fields missing from the body."""
+    await client.put(
+        "/api/user",
+        json={"chat_id": 104, "first_name": "Ann", "username": "ann"},
+    )
+
+    response = await client.put("/api/user", json={"chat_id": 104, "last_name": "Lee"})
+
+    user = response.json()
+    assert user["first_name"] == "Ann"
+    assert user["username"] == "ann"
+    assert user["last_name"] == "Lee"
+
+
+@pytest.mark.anyio
+async def test_cached_init_data_does_not_write(
+    client: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Checks that only the first validation of init data saves the profile."""
+    upserts: List[Any] = []
+    upsert_user = UserDAO.upsert_user
+
+    async def counting_upsert(self: UserDAO, *args: Any, **kwargs: Any) -> Any:
+        upserts.append(kwargs)
+        return await upsert_user(self, *args, **kwargs)
+
+    monkeypatch.setattr(UserDAO, "upsert_user", counting_upsert)
+    init_data = make_init_data({"id": 105, "first_name": "Bob"})
+
+    responses = [
+        await client.post("/api/user/validate_init_data", json={"init_data": init_data})
+        for _ in range(3)
+    ]
+
+    assert [res.json()["chat_id"] for res in responses] == [105, 105, 105]
+    assert len(upserts) == 1
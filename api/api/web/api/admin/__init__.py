@@ -0,0 +1,4 @@
+"""Admin API."""
+from api.web.api.admin.views import router
+
+__all__ = ["router"]
@@ -0,0 +1,23 @@
+import enum
+from typing import List
+
+from pydantic import BaseModel
+
+
+class ExportFormat(str, enum.Enum):  # noqa: WPS600
+    """Formats of table exports."""
+
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class ImportResultDTO(BaseModel):
+    """Result of a bulk import."""
+
+    inserted: int
+    updated: int
+    rejected: int
+    # Records overridden by a later record with the same chat_id
+    duplicates: int
+    # First errors of rejected records
+    errors: List[str] = []
@@ -0,0 +1,262 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.param_functions import Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row
+
+from api.db.dao.user_dao import USER_COLUMNS, UserDAO
+from api.db.models.user import BIRTHDAY_TZ
+from api.settings import settings
+from api.web.api.admin.schema import ExportFormat, ImportResultDTO
+
+router = APIRouter()
+
+MAX_REPORTED_ERRORS = 20
+NAME_MAX_LENGTH = 50
+BIGINT_MIN = -(2**63)
+BIGINT_MAX = 2**63 - 1
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+@router.get("/users/export")
+async def export_users(
+    format: ExportFormat = ExportFormat.NDJSON,
+    chunk_size: int = Query(default=settings.export_chunk_size, ge=1, le=50000),
+    user_dao: UserDAO = Depends(),
+) -> StreamingResponse:
+    """
+    Export all users.
+
+    Rows are streamed from a server-side cursor chunk by chunk,
+    so memory usage doesn't depend on the size of the table.
+
+    :param format: output format.
+    :param chunk_size: number of rows fetched from the database at a time.
+    :param user_dao: DAO for user model.
+    :returns: streaming response with all users.
+    """
+    if format == ExportFormat.CSV:
+        content = _csv_chunks(user_dao.stream_users(chunk_size))
+    else:
+        content = _ndjson_chunks(user_dao.stream_users(chunk_size))
+
+    return StreamingResponse(
+        content,
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f"attachment; filename=users.{format.value}",
+        },
+    )
+
+
+async def _ndjson_chunks(
+    partitions: AsyncIterator[Sequence[Row[Any]]],
+) -> AsyncIterator[str]:
+    async for rows in partitions:
+        yield "".join(
+            json.dumps(row._asdict(), default=_serialize_value) + "\n"
+            for row in rows
+        )
+
+
+async def _csv_chunks(
+    partitions: AsyncIterator[Sequence[Row[Any]]],
+) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.key for column in USER_COLUMNS])
+
+    async for rows in partitions:
+        writer.writerows(
+            [_serialize_value(value) for value in row] for row in rows
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _serialize_value(value: object) -> object:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+@router.post("/users/import")
+async def import_users(
+    request: Request,
+    format: ExportFormat = ExportFormat.NDJSON,
+    user_dao: UserDAO = Depends(),
+) -> ImportResultDTO:
+    """
+    Bulk import users from NDJSON or CSV request body.
+
+    Every record needs ``chat_id`` and may have ``first_name``,
+    ``last_name``, ``username`` and ``birthday``; other fields are
+    ignored, so files produced by the export can be imported back.
+    CSV files must start with a header. The body is parsed as it
+    arrives and sent to the database in batches with COPY.
+
+    :param request: current request.
+    :param format: input format.
+    :param user_dao: DAO for user model.
+    :returns: numbers of inserted, updated and rejected records.
+    """
+    report = _ImportReport()
+    batches = _import_batches(
+        request.stream(), format, report, settings.import_batch_size,
+    )
+    try:
+        inserted, updated = await user_dao.import_users(batches)
+    except UnicodeDecodeError as exc:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Body is not valid UTF-8: {exc}",
+        ) from exc
+
+    return ImportResultDTO(
+        inserted=inserted,
+        updated=updated,
+        rejected=report.rejected,
+        duplicates=report.accepted - inserted - updated,
+        errors=report.errors,
+    )
+
+
+class _ImportReport:
+    def __init__(self) -> None:
+        self.accepted = 0
+        self.rejected = 0
+        self.errors: List[str] = []
+
+    def reject(self, line_no: int, error: Exception) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"line {line_no}: {error!r}")
+
+
+async def _import_batches(
+    stream: AsyncIterator[bytes],
+    format: ExportFormat,
+    report: _ImportReport,
+    batch_size: int,
+) -> AsyncIterator[List[Tuple[Any, ...]]]:
+    header: Optional[List[str]] = None
+    batch = []
+
+    async for line_no, record in _records(_lines(stream), format):
+        if not record.strip():
+            continue
+        try:
+            if format == ExportFormat.CSV:
+                values = next(csv.reader(io.StringIO(record)))
+                if header is None:
+                    header = values
+                    continue
+                data = dict(zip(header, values))
+            else:
+                data = json.loads(record)
+            batch.append(_parse_record(line_no, data))
+        except (KeyError, TypeError, ValueError, csv.Error) as error:
+            report.reject(line_no, error)
+            continue
+
+        report.accepted += 1
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+async def _records(
+    lines: AsyncIterator[str],
+    format: ExportFormat,
+) -> AsyncIterator[Tuple[int, str]]:
+    # A CSV record goes on until its quotes are balanced,
+    # so quoted fields may contain newlines.
+    record: List[str] = []
+    first_line_no = 0
+    quotes = 0
+    async for line_no, line in _enumerate(lines):
+        if not record:
+            first_line_no = line_no
+        record.append(line)
+        if format == ExportFormat.CSV:
+            quotes += line.count('"')
+            if quotes % 2:
+                continue
+        yield first_line_no, "\n".join(record)
+        record = []
+        quotes = 0
+
+    if record:
+        yield first_line_no, "\n".join(record)
+
+
+async def _enumerate(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, str]]:
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        yield line_no, line
+
+
+async def _lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    buffer = b""
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode().rstrip("\r")
+    if buffer:
+        yield buffer.decode().rstrip("\r")
+
+
+def _parse_record(line_no: int, data: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (
+        line_no,
+        _parse_chat_id(data["chat_id"]),
+        _parse_name(data.get("first_name")),
+        _parse_name(data.get("last_name")),
+        _parse_name(data.get("username")),
+        _parse_birthday(data.get("birthday")),
+    )
+
+
+def _parse_chat_id(value: Any) -> int:
+    # bool is an int and int() truncates floats, neither is a chat id.
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"Invalid chat_id {value!r}")
+    chat_id = int(value)
+    if not BIGINT_MIN <= chat_id <= BIGINT_MAX:
+        raise ValueError(f"chat_id {chat_id} is out of range")
+    return chat_id
+
+
+def _parse_name(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    if not isinstance(value, str) or len(value) > NAME_MAX_LENGTH:
+        raise ValueError(f"Invalid name {value!r}")
+    return value
+
+
+def _parse_birthday(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    birthday = datetime.fromisoformat(value)
+    if birthday.tzinfo is None:
+        birthday = birthday.replace(tzinfo=BIRTHDAY_TZ)
+    return birthday
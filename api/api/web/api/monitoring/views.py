@@ -1,4 +1,18 @@
-from fastapi import APIRouter
+from typing import Any, Dict
+
+from fastapi import APIRouter, Request, Response, status
+from fastapi.param_functions import Depends
+from redis.asyncio import ConnectionPool
+
+from api.services.metrics.metrics import (
+    CONTENT_TYPE_LATEST,
+    refresh_pool_metrics,
+    render_metrics,
+)
+from api.services.readiness.dependency import get_readiness_probe
+from api.services.readiness.probe import ReadinessProbe
+from api.services.redis.dependency import get_redis_pool
+from api.services.user_cache.cache import UserCache
 
 router = APIRouter()
 
@@ -10,3 +24,48 @@ def health_check() -> None:
 
     It returns 200 if the project is healthy.
     """
+
+
+@router.get("/ready")
+def readiness_check(
+    response: Response,
+    probe: ReadinessProbe = Depends(get_readiness_probe),
+) -> Dict[str, Any]:
+    """
+    Checks whether the project can serve traffic.
+
+    Reports the last cached check of every dependency.
+    It returns 503 if any of them failed.
+
+    :param response: outgoing response.
+    :param probe: readiness probe.
+    :returns: status and latency of dependencies.
+    """
+    if not probe.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"ready": probe.ready, "dependencies": probe.results}
+
+
+@router.get("/cache_stats")
+async def cache_stats(
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
+) -> Dict[str, int]:
+    """
+    Get hit and miss counters of the user profile cache.
+
+    :param redis_pool: redis connection pool.
+    :returns: numbers of cache hits and misses.
+    """
+    return await UserCache(redis_pool).get_stats()
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics(request: Request) -> Response:
+    """
+    Export metrics in the prometheus format.
+
+    :param request: current request.
+    :returns: metrics of all workers.
+    """
+    refresh_pool_metrics(request.app)
+    return Response(render_metrics(), headers={"Content-Type": CONTENT_TYPE_LATEST})
@@ -1,8 +1,8 @@
 from fastapi.routing import APIRouter
-# from fastapi import Depends
-# from api.web.auth_bearer import JWTBearer
+from fastapi import Depends
+from api.web.auth_bearer import AdminJWTBearer
 # from api.web.api import CustomRouter
-from api.web.api import monitoring, redis, user
+from api.web.api import admin, monitoring, redis, user
 
 
 # , dependencies=[Depends(JWTBearer())]
@@ -11,3 +11,9 @@ api_router = APIRouter()
 api_router.include_router(monitoring.router)
 api_router.include_router(user.router, prefix="/user", tags=["user"])
 api_router.include_router(redis.router, prefix="/redis", tags=["redis"])
+api_router.include_router(
+    admin.router,
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(AdminJWTBearer())],
+)
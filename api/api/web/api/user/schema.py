@@ -2,7 +2,7 @@ import enum
 from typing import Any, Optional, List
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class ErrorMsg(enum.Enum):
@@ -10,6 +10,7 @@ class ErrorMsg(enum.Enum):
     VALIDATE_ERROR = "Произошла ошибка при авторизации. " \
                      "Попробуйте перезайти в приложение"
     USER_BANNED = "Ваш аккаунт заблокирован"
+    USER_NOT_FOUND = "Пользователь не найден"
     NOT_REGISTERED = "Вы не прошли регистрацию. " \
                      "Обратитесь к администратору, если вы видете эту ошибку"
     TWINK_DETECTED = "Обнаружена попытка нарушить правила пользования сервисом. " \
@@ -50,6 +51,34 @@ class UserModelDTO(UserCreateInputDTO):
     date_started: datetime
 
 
+class UserPageDTO(BaseModel):
+    items: List[UserModelDTO]
+    next_cursor: Optional[str] = None
+
+
+class UserBatchInputDTO(BaseModel):
+    ids: List[int] = Field(default_factory=list, max_length=300)
+    chat_ids: List[int] = Field(default_factory=list, max_length=300)
+    usernames: List[str] = Field(default_factory=list, max_length=300)
+
+
+class UserBatchOutputDTO(BaseModel):
+    """
+    Users found by a batch lookup.
+
+    Each list follows the order of the matching input list,
+    with None for users that were not found.
+    """
+
+    ids: List[Optional[UserModelDTO]] = []
+    chat_ids: List[Optional[UserModelDTO]] = []
+    usernames: List[Optional[UserModelDTO]] = []
+
+
+class UpcomingBirthdayDTO(UserModelDTO):
+    days_left: int
+
+
 class UserCreateOutputDTO(BasicResponseDTO, UserModelDTO):
     pass
 
@@ -2,15 +2,22 @@ import hmac
 import logging
 import base64
 import json
+import time
+from functools import lru_cache
 from urllib.parse import unquote, parse_qs
 from hashlib import sha256
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Union
 
-from fastapi import APIRouter
-from fastapi.param_functions import Depends
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.param_functions import Depends, Query
+from pydantic import TypeAdapter
+from redis.asyncio import ConnectionPool
 
 from api.db.dao.user_dao import UserDAO
-from api.db.models.user import UserModel
+from api.db.models.user import BIRTHDAY_TZ, UserModel
+from api.services.init_data_cache.cache import InitDataCache
+from api.services.init_data_cache.dependency import get_init_data_cache
+from api.services.redis.dependency import get_redis_pool
 from api.settings import settings
 from api.web.api.user.schema import (
     BasicResponseDTO,
@@ -20,39 +27,48 @@ from api.web.api.user.schema import (
     ValidateDataInputDTO,
     Error,
     ErrorMsg,
-    SetBirthdayDTO, SetPhotoURLDTO
+    SetBirthdayDTO, SetPhotoURLDTO,
+    UpcomingBirthdayDTO,
+    UserPageDTO,
+    UserBatchInputDTO,
+    UserBatchOutputDTO,
 )
-from datetime import datetime
+from datetime import date, datetime
 
 router = APIRouter()
 
 
+users_adapter: TypeAdapter[List[UserModelDTO]] = TypeAdapter(List[UserModelDTO])
+upcoming_adapter: TypeAdapter[List[UpcomingBirthdayDTO]] = TypeAdapter(
+    List[UpcomingBirthdayDTO],
+)
+
+
 @router.put("", response_model=None)
 @router.put("/", response_model=None)
 async def create_user(
     new_user: UserCreateInputDTO,
     user_dao: UserDAO = Depends(),
-) -> BasicResponseDTO | UserCreateOutputDTO:
+) -> UserCreateOutputDTO:
     """
-    Creates new user in database
+    Creates new user in database or updates its profile
+
+    Fields missing from the body are left as they are.
 
     :param new_user: new user model item.
     :param user_dao: DAO for user model.
     """
-    status = await user_dao.create_user(
-        new_user.chat_id, new_user.first_name,
-        new_user.last_name, new_user.username,
-        new_user.photo_url
+    profile = new_user.model_dump(
+        include={"first_name", "last_name", "username", "photo_url"},
+        exclude_unset=True,
     )
+    user = await user_dao.upsert_user(new_user.chat_id, **profile)
 
-    user: UserModel = await user_dao.get_user(chat_id=new_user.chat_id)
-    if user and status:
-        return UserCreateOutputDTO(
-            result=status,
-            **user.__dict__,
-            share_link=get_share_link(user.id)
-        )
-    return BasicResponseDTO(result=status)
+    return UserCreateOutputDTO(
+        result=True,
+        **user.__dict__,
+        share_link=get_share_link(user.id)
+    )
 
 
 def get_share_link(user_id: int):
@@ -62,18 +78,39 @@ def get_share_link(user_id: int):
     return invite_link
 
 
+def users_from_rows(rows: Sequence[Any]) -> List[UserModelDTO]:
+    """
+    Build user DTOs from rows of user columns.
+
+    :param rows: rows with attributes named as DTO fields.
+    :return: user DTOs with share links.
+    """
+    users = users_adapter.validate_python(rows, from_attributes=True)
+    for user in users:
+        user.share_link = get_share_link(user.id)
+    return users
+
+
+def json_response(content: Union[str, bytes]) -> Response:
+    # Pydantic serializes DTOs to JSON directly, skipping jsonable_encoder
+    return Response(content=content, media_type="application/json")
+
+
 @router.get("", response_model=None)
 @router.get("/", response_model=None)
 async def get_users(
     id: Optional[int] = None,
     chat_id: Optional[int] = None,
     username: Optional[str] = None,
-    limit: Optional[int] = 10,
-    offset: Optional[int] = 0,
+    limit: int = Query(default=10, ge=1, le=1000),
+    cursor: Optional[str] = None,
     user_dao: UserDAO = Depends(),
-) -> List[UserModelDTO] | UserModelDTO | None:
+) -> Response | UserModelDTO | None:
     """
-    Get all users
+    Get a single user or a page of all users.
+
+    Pages are addressed with an opaque ``cursor``: pass the
+    ``next_cursor`` of the previous page to get the next one.
     """
     if id is not None or chat_id is not None or username is not None:
         user = await user_dao.get_user(id=id, chat_id=chat_id, username=username)
@@ -81,59 +118,203 @@ async def get_users(
             return None
         return UserModelDTO(**user.__dict__, share_link=get_share_link(user.id))
 
-    users = await user_dao.get_all_users(limit=limit, offset=offset)
-    if not users:
-        return []
+    after_id = decode_cursor(cursor) if cursor else None
+    # One extra row tells whether there is a next page
+    users = await user_dao.get_all_users(limit=limit + 1, after_id=after_id)
+
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1].id)
+
+    page = UserPageDTO(items=users_from_rows(users), next_cursor=next_cursor)
+    return json_response(page.model_dump_json())
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(cursor + padding).decode())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+@router.post("/batch", response_model=UserBatchOutputDTO)
+async def get_users_batch(
+    body: UserBatchInputDTO,
+    user_dao: UserDAO = Depends(),
+) -> Response:
+    """
+    Get many users by ids, chat ids or usernames at once.
+
+    :param body: lists of ids, chat ids and usernames.
+    :param user_dao: DAO for user model.
+    :return: users in the order of the request, None for missing ones.
+    """
+    users = await user_dao.get_users_batch(
+        ids=body.ids, chat_ids=body.chat_ids, usernames=body.usernames,
+    )
+
+    by_id = {}
+    by_chat_id = {}
+    by_username = {}
+    for user in users_from_rows(users):
+        by_id[user.id] = user
+        by_chat_id[user.chat_id] = user
+        if user.username:
+            by_username[user.username] = user
+
+    output = UserBatchOutputDTO(
+        ids=[by_id.get(key) for key in body.ids],
+        chat_ids=[by_chat_id.get(key) for key in body.chat_ids],
+        usernames=[by_username.get(key) for key in body.usernames],
+    )
+    return json_response(output.model_dump_json())
+
+
+@router.get("/search", response_model=List[UserModelDTO])
+async def search_users(
+    q: str = Query(min_length=1, max_length=100),
+    limit: int = Query(default=20, ge=1, le=100),
+    user_dao: UserDAO = Depends(),
+) -> Response:
+    """
+    Search users by first name, last name or username.
+
+    :param q: part of a name or username.
+    :param limit: maximum number of users to return.
+    :param user_dao: DAO for user model.
+    :return: matching users, best matches first.
+    """
+    users = await user_dao.filtered_users(name=q, limit=limit)
+    return json_response(users_adapter.dump_json(users_from_rows(users)))
+
+
+@router.get("/upcoming", response_model=List[UpcomingBirthdayDTO])
+async def get_upcoming_birthdays(
+    days: int = Query(default=7, ge=0, le=366),
+    limit: int = Query(default=100, ge=1, le=1000),
+    user_dao: UserDAO = Depends(),
+) -> Response:
+    """
+    Get users whose birthday is within the next ``days`` days.
+
+    :param days: size of the window, starting today in the birthday time zone.
+    :param limit: maximum number of users to return.
+    :param user_dao: DAO for user model.
+    :return: users ordered by the number of days left to their birthday.
+    """
+    today = datetime.now(BIRTHDAY_TZ).date()
+    users = await user_dao.get_upcoming_birthdays(today, days, limit)
+
+    upcoming = [
+        UpcomingBirthdayDTO(
+            **user._mapping,
+            share_link=get_share_link(user.id),
+            days_left=days_until_birthday(user.birthday, today),
+        )
+        for user in users
+    ]
+    return json_response(upcoming_adapter.dump_json(upcoming))
+
 
-    return [UserModelDTO(**item.__dict__) for item in users]
+def days_until_birthday(birthday: datetime, today: date) -> int:
+    birthday = birthday.astimezone(BIRTHDAY_TZ)
+    for year in (today.year, today.year + 1):
+        try:
+            next_birthday = birthday.date().replace(year=year)
+        except ValueError:
+            # February 29 is celebrated on March 1 in non-leap years
+            next_birthday = date(year, 3, 1)
+        if next_birthday >= today:
+            return (next_birthday - today).days
+    return 0
 
 
 @router.post("/validate_init_data", response_model=None)
 async def validate_init_data(
     body: ValidateDataInputDTO,
     user_dao: UserDAO = Depends(),
+    init_data_cache: InitDataCache = Depends(get_init_data_cache),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
 ) -> BasicResponseDTO | UserCreateOutputDTO:
     """
     Validates Init Data from Web App
-    """
-    parsed_data: dict = parse_qs(unquote(body.init_data))
-    for key, value in parsed_data.items():
-        parsed_data[key] = value[0]
-
-    print(parsed_data)
-    hex_hash = parsed_data.pop("hash")
 
-    if not hex_hash:
-        return BasicResponseDTO(
-            result=False,
-            detailed=Error(msg=ErrorMsg.VALIDATE_ERROR)
+    Init data that was already verified is taken from the cache,
+    without parsing and checking the hash again, and its user is only
+    read: the profile is written after a fresh check.
+    """
+    telegram_user = await init_data_cache.get(body.init_data, redis_pool)
+
+    user = None
+    if telegram_user is not None:
+        # The profile was saved when this init data was first verified
+        user = await user_dao.get_user(chat_id=telegram_user["id"])
+    else:
+        parsed_data: dict = parse_qs(unquote(body.init_data))
+        for key, value in parsed_data.items():
+            parsed_data[key] = value[0]
+
+        hex_hash = parsed_data.pop("hash", None)
+        auth_expires_at = get_auth_expires_at(parsed_data)
+
+        if not hex_hash or (
+            auth_expires_at is not None and auth_expires_at <= time.time()
+        ):
+            return BasicResponseDTO(
+                result=False,
+                detailed=Error(msg=ErrorMsg.VALIDATE_ERROR)
+            )
+
+        if not check_hash(parsed_data, hex_hash):
+            return BasicResponseDTO(
+                result=False,
+                detailed=Error(msg=ErrorMsg.UNKNOWN)
+            )
+
+        telegram_user = json.loads(str(parsed_data.get("user")))
+        await init_data_cache.set(
+            body.init_data, telegram_user, auth_expires_at, redis_pool
         )
 
-    is_valid = check_hash(parsed_data, hex_hash)
-
-    telegram_user = json.loads(str(parsed_data.get("user")))
-    user: UserModel = await user_dao.get_user(chat_id=telegram_user.get("id"))
-
-    if is_valid and user is None:
-        user_data = UserCreateInputDTO(
-            chat_id=telegram_user.get("id"),
+    if user is None:
+        user = await user_dao.upsert_user(
+            chat_id=telegram_user["id"],
             first_name=telegram_user.get("first_name"),
             last_name=telegram_user.get("last_name"),
             username=telegram_user.get("username"),
             photo_url=telegram_user.get("photo_url")
         )
 
-        created_user: UserCreateOutputDTO = await create_user(user_data, user_dao)
-        return created_user
+    return UserCreateOutputDTO(
+        result=True,
+        **user.__dict__,
+        share_link=get_share_link(user.id)
+    )
 
-    if is_valid and user is not None:
-        return UserCreateOutputDTO(
-            result=is_valid,
-            **user.__dict__,
-            share_link=get_share_link(user.id)
-        )
 
-    return BasicResponseDTO(result=False, detailed=Error(msg=ErrorMsg.UNKNOWN))
+def get_auth_expires_at(parsed_data: Dict[str, Any]) -> Optional[float]:
+    auth_date = parsed_data.get("auth_date")
+    if not settings.init_data_expire or auth_date is None:
+        return None
+    try:
+        return int(auth_date) + settings.init_data_expire
+    except ValueError:
+        return 0
+
+
+@lru_cache(maxsize=1)
+def get_secret_key(bot_token: str) -> bytes:
+    return hmac.new(
+        key=b"WebAppData",
+        msg=bot_token.encode(),
+        digestmod=sha256,
+    ).digest()
 
 
 def check_hash(parsed_data, hex_hash) -> bool:
@@ -141,35 +322,42 @@ def check_hash(parsed_data, hex_hash) -> bool:
         f"{key}={value}" for key, value in sorted(parsed_data.items())
     )
 
-    secret_key = hmac.new(
-        key=b"WebAppData",
-        msg=settings.bot_token.encode(),
-        digestmod=sha256,
-    )
-
-    is_valid = (
-        hmac.new(
-            secret_key.digest(),
-            data_check_string.encode(), sha256
-        ).hexdigest() == hex_hash
-    )
+    data_hash = hmac.new(
+        get_secret_key(settings.bot_token),
+        data_check_string.encode(), sha256
+    ).hexdigest()
 
-    return is_valid
+    return hmac.compare_digest(data_hash.encode(), hex_hash.encode())
 
 
-@router.post("/birthday", response_model=BasicResponseDTO)
+@router.post("/birthday", response_model=None)
 async def set_birthday(
     body: SetBirthdayDTO,
     user_dao: UserDAO = Depends(),
-) -> BasicResponseDTO:
-    status = await user_dao.set_birthday(body.user_id, body.birthday)
-    return BasicResponseDTO(result=status)
+) -> BasicResponseDTO | UserCreateOutputDTO:
+    user = await user_dao.set_birthday(body.user_id, body.birthday)
+    return get_update_response(user)
 
 
-@router.post("/photo_url", response_model=BasicResponseDTO)
+@router.post("/photo_url", response_model=None)
 async def set_photo_url(
     body: SetPhotoURLDTO,
     user_dao: UserDAO = Depends(),
-) -> BasicResponseDTO:
-    status = await user_dao.update_photo(body.user_id, body.photo_url)
-    return BasicResponseDTO(result=status)
+) -> BasicResponseDTO | UserCreateOutputDTO:
+    user = await user_dao.update_photo(body.user_id, body.photo_url)
+    return get_update_response(user)
+
+
+def get_update_response(
+    user: Optional[UserModel],
+) -> BasicResponseDTO | UserCreateOutputDTO:
+    if user is None:
+        return BasicResponseDTO(
+            result=False,
+            detailed=Error(msg=ErrorMsg.USER_NOT_FOUND)
+        )
+    return UserCreateOutputDTO(
+        result=True,
+        **user.__dict__,
+        share_link=get_share_link(user.id)
+    )
@@ -1,9 +1,10 @@
 from importlib import metadata
 
 from fastapi import FastAPI
-from fastapi.responses import UJSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
+from api.services.metrics.middleware import PrometheusMiddleware
 from api.web.api.router import api_router
 from api.web.lifetime import register_shutdown_event, register_startup_event
 from api.settings import settings
@@ -23,7 +24,7 @@ def get_app() -> FastAPI:
         docs_url="/api/docs",
         redoc_url="/api/redoc",
         openapi_url="/api/openapi.json",
-        default_response_class=UJSONResponse,
+        default_response_class=ORJSONResponse,
     )
 
     # Adds startup and shutdown events.
@@ -42,4 +43,7 @@ def get_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Request latency per route and status code.
+    app.add_middleware(PrometheusMiddleware)
+
     return app
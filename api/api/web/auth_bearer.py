@@ -3,7 +3,7 @@ from typing import Dict
 from fastapi import Request, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
-from api.settings import settings
+from api.settings import DEFAULT_JWT_SECRET, settings
 import time
 from datetime import timedelta
 
@@ -36,6 +36,31 @@ class JWTBearer(HTTPBearer):
         return is_token_valid
 
 
+class AdminJWTBearer(JWTBearer):
+    """
+    Bearer auth for admin endpoints.
+
+    The token must carry the ``admin`` claim. While the JWT secret is
+    the publicly known default anyone can sign such a token, so admin
+    endpoints are refused until API_JWT_SECRET is set.
+    """
+
+    async def __call__(  # type: ignore[override]
+        self,
+        request: Request,
+    ) -> str:
+        if settings.jwt_secret == DEFAULT_JWT_SECRET:
+            raise HTTPException(
+                status_code=503,
+                detail="Admin API is disabled until API_JWT_SECRET is set.",
+            )
+        return await super(AdminJWTBearer, self).__call__(request)
+
+    def verify_jwt(self, jwt_token: str) -> bool:
+        payload = decode_jwt(jwt_token)
+        return bool(payload) and payload.get("admin") is True
+
+
 def decode_jwt(token: str) -> dict:
     try:
         decoded_token = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
@@ -44,10 +69,12 @@ def decode_jwt(token: str) -> dict:
         return {}
 
 
-def sign_jwt(user_id: str) -> Dict[str, str]:
+def sign_jwt(user_id: str, admin: bool = False) -> Dict[str, str]:
     payload = {
         "user_id": user_id,
-        "expires": time.time() + timedelta(days=1).seconds
+        "expires": time.time() + timedelta(days=1).total_seconds()
     }
+    if admin:
+        payload["admin"] = True
     token = jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
     return token
@@ -1,32 +1,146 @@
-from typing import Awaitable, Callable
+import asyncio
+import logging
+from contextlib import suppress
+from typing import Any, Awaitable, Callable, Dict
+from uuid import uuid4
 
 from fastapi import FastAPI
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
-
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from yarl import URL
+
+from api.db.routing import ReplicaSet, RoutingSession
+from api.services.init_data_cache.lifetime import init_init_data_cache
+from api.services.metrics.lifetime import init_metrics, shutdown_metrics
+from api.services.metrics.pool import InstrumentedAsyncQueuePool
+from api.services.readiness.lifetime import init_readiness, shutdown_readiness
 from api.services.redis.lifetime import init_redis, shutdown_redis
 from api.settings import settings
 # from api.db.utils import set_default_settings
 
+logger = logging.getLogger(__name__)
+
+
+def _db_connect_args() -> Dict[str, Any]:  # pragma: no cover
+    """
+    Build asyncpg connection arguments from settings.
+
+    pgbouncer in transaction mode may run every statement on a different
+    server connection, so statements prepared earlier can be missing or
+    belong to someone else. The pgbouncer profile turns off both caches
+    and gives every prepared statement a unique name.
+
+    :return: connect_args for the engine.
+    """
+    if settings.db_pgbouncer:
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return {
+        "statement_cache_size": settings.db_statement_cache_size,
+        "prepared_statement_cache_size": settings.db_prepared_statement_cache_size,
+    }
+
+
+async def _warm_db_pool(engine: AsyncEngine) -> None:  # pragma: no cover
+    """
+    Open the pool's connections before the first request needs them.
+
+    A database that is not up yet only leaves the pool cold:
+    the readiness probe reports it.
+
+    :param engine: engine to warm.
+    """
+
+    async def _connect() -> None:  # noqa: WPS430
+        async with engine.connect():
+            pass  # noqa: WPS420
+
+    results = await asyncio.gather(
+        *(_connect() for _ in range(settings.db_pool_size)),
+        return_exceptions=True,
+    )
+    errors = [res for res in results if isinstance(res, Exception)]
+    if errors:
+        logger.warning("Database pool warmup failed: %s", errors[0])
+
+
+def _create_engine(url: URL) -> AsyncEngine:  # pragma: no cover
+    """
+    Create an engine with the pool configured in settings.
+
+    :param url: database URL.
+    :return: new engine.
+    """
+    return create_async_engine(
+        str(url),
+        echo=settings.db_echo,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=_db_connect_args(),
+    )
+
 
 def _setup_db(app: FastAPI) -> None:  # pragma: no cover
     """
     Creates connection to the database.
 
     This function creates SQLAlchemy engine instance,
+    engines of the read replicas,
     session_factory for creating sessions
     and stores them in the application's state property.
 
     :param app: fastAPI application.
     """
-    engine = create_async_engine(str(settings.db_url), echo=settings.db_echo)
+    engine = _create_engine(settings.db_url)
+    replicas = ReplicaSet(
+        [_create_engine(url) for url in settings.db_replica_urls],
+        check_interval=settings.db_replica_check_interval,
+        check_timeout=settings.db_replica_check_timeout,
+    )
     session_factory = async_sessionmaker(
         engine,
         expire_on_commit=False,
+        sync_session_class=RoutingSession,
+        replicas=replicas,
     )
     app.state.db_engine = engine
+    app.state.db_replicas = replicas
     app.state.db_session_factory = session_factory
 
 
+async def _start_replica_checks(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Check the read replicas and keep checking them in background.
+
+    :param app: fastAPI application.
+    """
+    replicas: ReplicaSet = app.state.db_replicas
+    app.state.db_replicas_task = None
+    if replicas.engines:
+        await replicas.check()
+        app.state.db_replicas_task = asyncio.create_task(replicas.run())
+
+
+async def _shutdown_replicas(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Stop checking the read replicas and close their connections.
+
+    :param app: fastAPI application.
+    """
+    task = app.state.db_replicas_task
+    if task is not None:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await app.state.db_replicas.dispose()
+
+
 def register_startup_event(
     app: FastAPI,
 ) -> Callable[[], Awaitable[None]]:  # pragma: no cover
@@ -44,7 +158,15 @@ def register_startup_event(
     async def _startup() -> None:  # noqa: WPS430
         app.middleware_stack = None
         _setup_db(app)
+        if settings.db_pool_warmup:
+            await _warm_db_pool(app.state.db_engine)
+            for replica in app.state.db_replicas.engines:
+                await _warm_db_pool(replica)
+        await _start_replica_checks(app)
         init_redis(app)
+        init_init_data_cache(app)
+        init_metrics(app)
+        await init_readiness(app)
         app.middleware_stack = app.build_middleware_stack()
         # await set_default_settings(app.state.db_session_factory)
         pass  # noqa: WPS420
@@ -64,6 +186,9 @@ def register_shutdown_event(
 
     @app.on_event("shutdown")
     async def _shutdown() -> None:  # noqa: WPS430
+        await shutdown_readiness(app)
+        await shutdown_metrics(app)
+        await _shutdown_replicas(app)
         await app.state.db_engine.dispose()
 
         await shutdown_redis(app)
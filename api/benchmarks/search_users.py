@@ -0,0 +1,137 @@
+"""
+Benchmark of the user name search.
+
+Creates a scratch database ``<API_DB_BASE>_bench``, seeds it with random
+users (1M by default) and times ``UserDAO.filtered_users`` on a set of
+typical friend-finder queries. Like the application, it needs the
+pg_trgm extension on the server.
+
+Run it from the project root::
+
+    python -m benchmarks.search_users --users 1000000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from api.db.dao.user_dao import UserDAO
+from api.db.meta import meta
+from api.db.models import load_all_models
+from api.db.utils import create_database, drop_database
+from api.settings import settings
+
+FIRST_NAMES = (
+    "Alexander", "Aleksandr", "Dmitry", "Ivan", "Maxim", "Sergey", "Andrey",
+    "Alexey", "Mikhail", "Nikita", "Anna", "Maria", "Elena", "Olga",
+    "Natalia", "Ekaterina", "Daria", "Sofia", "Polina", "Victoria",
+)
+LAST_NAMES = (
+    "Ivanov", "Smirnov", "Kuznetsov", "Popov", "Vasiliev", "Petrov",
+    "Sokolov", "Mikhailov", "Novikov", "Fedorov", "Morozov", "Volkov",
+    "Alekseev", "Lebedev", "Semenov", "Egorov", "Pavlov", "Kozlov",
+)
+QUERIES = (
+    "ivan",  # substring of first and last names
+    "Petrov",  # exact last name
+    "Alexandr",  # misspelled first name, found by similarity
+    "kozlov_4242",  # username
+    "zzzz",  # nothing matches
+)
+
+
+def _sql_array(values: Sequence[str]) -> str:
+    return "ARRAY[{0}]".format(", ".join(f"'{value}'" for value in values))
+
+
+# Names are spread over users deterministically, so runs are comparable.
+SEED_USERS = f"""
+INSERT INTO users (chat_id, first_name, last_name, username, date_started)
+SELECT
+    g,
+    first_names[1 + (g * 7919) % cardinality(first_names)],
+    last_names[1 + (g * 104729) % cardinality(last_names)],
+    lower(last_names[1 + (g * 104729) % cardinality(last_names)]) || '_' || g,
+    LOCALTIMESTAMP
+FROM
+    generate_series(1, :users) AS g,
+    (VALUES ({_sql_array(FIRST_NAMES)}, {_sql_array(LAST_NAMES)}))
+        AS names (first_names, last_names)
+"""
+
+
+async def seed(users: int) -> None:
+    """
+    Create the scratch database and fill it with users.
+
+    :param users: number of users to insert.
+    """
+    load_all_models()
+    await create_database()
+    engine = create_async_engine(str(settings.db_url))
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(meta.create_all)
+        await conn.execute(text(SEED_USERS), {"users": users})
+        await conn.execute(text("ANALYZE users"))
+    await engine.dispose()
+
+
+async def measure(repeat: int, limit: int) -> None:
+    """
+    Time every query and print the latency percentiles.
+
+    :param repeat: number of runs per query.
+    :param limit: number of results requested per search.
+    """
+    engine = create_async_engine(str(settings.db_url))
+    async with AsyncSession(engine) as session:
+        dao = UserDAO(session, None)
+        print(f"{'query':<14}{'found':>7}{'p50 ms':>10}{'p95 ms':>10}")  # noqa: WPS421
+        for query in QUERIES:
+            timings: List[float] = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                rows = await dao.filtered_users(name=query, limit=limit)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(  # noqa: WPS421
+                f"{query:<14}{len(rows):>7}"
+                f"{statistics.median(timings):>10.2f}{p95:>10.2f}",
+            )
+    await engine.dispose()
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument(
+        "--keep",
+        action="store_true",
+        help="keep the scratch database",
+    )
+    args = parser.parse_args()
+
+    settings.db_base = f"{settings.db_base}_bench"
+    start = time.perf_counter()
+    await seed(args.users)
+    print(  # noqa: WPS421
+        f"seeded {args.users} users in {time.perf_counter() - start:.1f}s",
+    )
+    try:
+        await measure(args.repeat, args.limit)
+    finally:
+        if not args.keep:
+            await drop_database()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,135 @@
+"""
+Micro-benchmark of user list serialization.
+
+Compares building the JSON body for a list of users the old way (ORM
+instances, ``UserModelDTO(**user.__dict__)`` and ``jsonable_encoder``)
+with the current one (column rows validated by a TypeAdapter and
+dumped by pydantic). No database is needed.
+
+Run it from the project root::
+
+    python -m benchmarks.serialize_users --users 10000
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, List, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.engine import Row
+from sqlalchemy.engine.result import IteratorResult, SimpleResultMetaData
+
+from api.db.dao.user_dao import USER_COLUMNS
+from api.db.models.user import UserModel
+from api.web.api.user.schema import UserModelDTO
+from api.web.api.user.views import get_share_link, users_adapter, users_from_rows
+
+try:
+    import ujson as json_lib  # noqa: WPS433
+except ImportError:
+    json_lib = json  # type: ignore[no-redef]
+
+
+def make_values(users: int) -> List[Tuple[Any, ...]]:
+    """
+    Generate values of USER_COLUMNS.
+
+    :param users: number of users.
+    :return: one tuple per user.
+    """
+    started = datetime(2024, 1, 1)
+    return [
+        (
+            index,
+            1_000_000 + index,
+            f"First{index}",
+            f"Last{index}",
+            f"user_{index}",
+            started - timedelta(days=index % 20000),
+            f"https://t.me/i/userpic/{index}.jpg",
+            started + timedelta(minutes=index),
+        )
+        for index in range(1, users + 1)
+    ]
+
+
+def make_rows(values: List[Tuple[Any, ...]]) -> List[Row]:  # type: ignore[type-arg]
+    """
+    Wrap values into rows, as the DAO returns them.
+
+    :param values: values of USER_COLUMNS.
+    :return: rows.
+    """
+    keys = [column.key for column in USER_COLUMNS]
+    return list(IteratorResult(SimpleResultMetaData(keys), iter(values)).all())
+
+
+def before(users: List[UserModel]) -> bytes:
+    """
+    Serialize ORM instances as the list endpoints used to.
+
+    :param users: users.
+    :return: JSON body.
+    """
+    dtos = [
+        UserModelDTO(**user.__dict__, share_link=get_share_link(user.id))
+        for user in users
+    ]
+    return json_lib.dumps(jsonable_encoder(dtos)).encode()
+
+
+def after(rows: List[Row]) -> bytes:  # type: ignore[type-arg]
+    """
+    Serialize column rows as the list endpoints do now.
+
+    :param rows: rows of USER_COLUMNS.
+    :return: JSON body.
+    """
+    return users_adapter.dump_json(users_from_rows(rows))
+
+
+def measure(name: str, serialize: Callable[[], bytes], repeat: int) -> float:
+    """
+    Time ``serialize`` and print the median.
+
+    :param name: label of the measurement.
+    :param serialize: function to time.
+    :param repeat: number of runs.
+    :return: median time in milliseconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        serialize()
+        timings.append((time.perf_counter() - start) * 1000)
+    median = statistics.median(timings)
+    print(f"{name:<8}{median:>10.1f} ms")  # noqa: WPS421
+    return median
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    values = make_values(args.users)
+    keys = [column.key for column in USER_COLUMNS]
+    instances = [UserModel(**dict(zip(keys, row))) for row in values]
+    rows = make_rows(values)
+    if json.loads(before(instances)) != json.loads(after(rows)):
+        raise RuntimeError("Both ways must produce the same JSON")
+
+    print(  # noqa: WPS421
+        f"{args.users} users, before uses {json_lib.__name__}",
+    )
+    old = measure("before", lambda: before(instances), args.repeat)
+    new = measure("after", lambda: after(rows), args.repeat)
+    print(f"speedup {old / new:.1f}x")  # noqa: WPS421
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,18 @@
 import asyncio
+import glob
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import socket
+import sys
+from typing import Any, Optional
 
 import aiojobs
+import asyncpg
 import orjson
+import prometheus_client.multiprocess
+import structlog
 from aiocache import Cache
 from aiogram import Bot, Dispatcher
 from aiogram.client.session.aiohttp import AiohttpSession
@@ -10,7 +21,7 @@ from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
 from aiohttp import web
 from redis.asyncio import Redis
 
-from app import handlers, utils, web_handlers
+from app import handlers, jobs, middlewares, utils, web_handlers
 from app.database.engine import AsyncSession
 from app.utils.get_settings import get_settings
 
@@ -30,10 +41,63 @@ async def create_db_connections(dp: Dispatcher) -> Cache:
             db=settings.REDIS_CACHE_DB,
         )
 
+    logger = structlog.get_logger()
+    if settings.BIRTHDAY_REMINDERS_ENABLED:
+        dp["db_pool"] = await utils.connect_to_services.wait_postgres(
+            logger=logger,
+            host=settings.POSTGRES_HOST,
+            port=settings.POSTGRES_PORT,
+            user=settings.POSTGRES_USER,
+            password=settings.POSTGRES_PASSWORD,
+            database=settings.POSTGRES_DB,
+        )
+    if settings.BIRTHDAY_REMINDERS_ENABLED or settings.OUTBOX_ENABLED:
+        dp["jobs_redis"] = await utils.connect_to_services.wait_redis_pool(
+            logger=logger,
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            password=settings.REDIS_PASSWORD,
+            database=settings.REDIS_JOBS_DB,
+        )
+
     return cache
 
 
+async def setup_jobs(dp: Dispatcher, bot: Bot, scheduler: aiojobs.Scheduler) -> None:
+    dp["jobs"] = []
+    if settings.OUTBOX_ENABLED:
+        outbox = utils.outbox.Outbox(
+            dp["jobs_redis"],
+            structlog.get_logger().bind(job="outbox"),
+            max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+            retry_idle=settings.OUTBOX_RETRY_IDLE,
+        )
+        await outbox.setup()
+        dp["outbox"] = outbox
+        for i in range(settings.OUTBOX_WORKERS):
+            dp["jobs"].append(
+                await scheduler.spawn(
+                    outbox.run_worker(bot, f"{socket.gethostname()}-{os.getpid()}-{i}")
+                )
+            )
+    if settings.BIRTHDAY_REMINDERS_ENABLED:
+        dp["jobs"].append(
+            await scheduler.spawn(
+                jobs.birthday_reminders.birthday_reminders_job(
+                    bot,
+                    dp["db_pool"],
+                    dp["jobs_redis"],
+                    structlog.get_logger().bind(job="birthday_reminders"),
+                    dp.workflow_data.get("outbox"),
+                )
+            )
+        )
+
+
 async def close_db_connections(dp: Dispatcher) -> None:
+    if "jobs" in dp.workflow_data:
+        background_jobs: list[aiojobs.Job[None]] = dp["jobs"]
+        await asyncio.gather(*(job.close() for job in background_jobs))
     if "temp_bot_cloud_session" in dp.workflow_data:
         temp_bot_cloud_session: AiohttpSession = dp["temp_bot_cloud_session"]
         await temp_bot_cloud_session.close()
@@ -46,9 +110,24 @@ async def close_db_connections(dp: Dispatcher) -> None:
     if "cache" in dp.workflow_data:
         cache: Cache = dp["cache"]  # type: ignore[type-arg]
         await cache.REDIS.close()
+    if "db_pool" in dp.workflow_data:
+        db_pool: asyncpg.Pool = dp["db_pool"]
+        await db_pool.close()
+    if "jobs_redis" in dp.workflow_data:
+        jobs_redis: Redis = dp["jobs_redis"]  # type: ignore[type-arg]
+        await jobs_redis.close()
+
+
+def setup_logging() -> None:
+    structlog.configure(
+        wrapper_class=structlog.make_filtering_bound_logger(settings.LOGGING_LEVEL),
+    )
 
 
 def setup_handlers(dp: Dispatcher) -> None:
+    dp.update.outer_middleware(
+        middlewares.StructLoggingMiddleware(structlog.get_logger().bind(component="updates"))
+    )
     dp.include_router(handlers.user.prepare_router())
 
 
@@ -59,6 +138,10 @@ async def setup_aiogram(dp: Dispatcher) -> None:
 
 async def aiohttp_on_startup(app: web.Application) -> None:
     dp: Dispatcher = app["dp"]
+    update_pool: utils.update_pool.UpdateWorkerPool = app["update_pool"]
+    update_pool.start()
+    scheduler: aiojobs.Scheduler = app["scheduler"]
+    await scheduler.spawn(utils.metrics.refresh_gauges_job(app))
     workflow_data = {"app": app, "dispatcher": dp}
     if "bot" in app:
         workflow_data["bot"] = app["bot"]
@@ -67,20 +150,24 @@ async def aiohttp_on_startup(app: web.Application) -> None:
 
 async def aiohttp_on_shutdown(app: web.Application) -> None:
     dp: Dispatcher = app["dp"]
-    for i in [app, *app._subapps]:  # dirty
-        if "scheduler" in i:
-            scheduler: aiojobs.Scheduler = i["scheduler"]
-            scheduler._closed = True
-            while scheduler.pending_count != 0:
-                await asyncio.sleep(1)
+    update_pool: utils.update_pool.UpdateWorkerPool = app["update_pool"]
+    await update_pool.close(timeout=settings.SHUTDOWN_DRAIN_TIMEOUT)
+    scheduler: aiojobs.Scheduler = app["scheduler"]
+    await scheduler.close()
     workflow_data = {"app": app, "dispatcher": dp}
     if "bot" in app:
         workflow_data["bot"] = app["bot"]
     await dp.emit_shutdown(**workflow_data)
 
 
-async def aiogram_on_startup_webhook(dispatcher: Dispatcher, bot: Bot) -> None:
+async def aiogram_on_startup_webhook(
+    dispatcher: Dispatcher, bot: Bot, app: web.Application
+) -> None:
     await setup_aiogram(dispatcher)
+    await setup_jobs(dispatcher, bot, app["scheduler"])
+    # With several webhook workers only the first one registers the webhook.
+    if dispatcher.workflow_data.get("worker_index", 0) != 0:
+        return
     await bot.set_webhook(
         url=settings.MAIN_WEBHOOK_ADDRESS.format(
             token=settings.BOT_TOKEN, bot_id=settings.BOT_TOKEN.split(":")[0]
@@ -99,16 +186,38 @@ async def aiogram_on_shutdown_webhook(dispatcher: Dispatcher, bot: Bot) -> None:
 async def aiogram_on_startup_polling(dispatcher: Dispatcher, bot: Bot) -> None:
     await bot.delete_webhook(drop_pending_updates=True)
     await setup_aiogram(dispatcher)
+    dispatcher["scheduler"] = aiojobs.Scheduler()
+    await setup_jobs(dispatcher, bot, dispatcher["scheduler"])
 
 
 async def aiogram_on_shutdown_polling(dispatcher: Dispatcher, bot: Bot) -> None:
     await close_db_connections(dispatcher)
+    if "scheduler" in dispatcher.workflow_data:
+        scheduler: aiojobs.Scheduler = dispatcher["scheduler"]
+        await scheduler.close()
     await bot.session.close()
     await dispatcher.storage.close()
 
 
-async def setup_aiohttp_app(bot: Bot, dp: Dispatcher) -> web.Application:
+async def setup_aiohttp_app(
+    bot: Bot,
+    dp: Dispatcher,
+    redis: Optional[Redis] = None,  # type: ignore[type-arg]
+) -> web.Application:
     scheduler = aiojobs.Scheduler()
+    update_pool = utils.update_pool.UpdateWorkerPool(
+        bot,
+        dp,
+        structlog.get_logger().bind(component="update_pool"),
+        shards=settings.UPDATE_WORKERS,
+        max_queued=settings.MAX_UPDATES_IN_QUEUE,
+    )
+    update_dedup = utils.update_dedup.UpdateDeduplicator(
+        structlog.get_logger().bind(component="update_dedup"),
+        redis=redis,
+        ttl=settings.UPDATE_DEDUP_TTL,
+        key_prefix=f"tg_update:{bot.id}",
+    )
     app = web.Application()
     subapps: list[tuple[str, web.Application]] = [
         ("/tg/webhooks/", web_handlers.tg_updates_app),
@@ -117,44 +226,116 @@ async def setup_aiohttp_app(bot: Bot, dp: Dispatcher) -> web.Application:
         subapp["bot"] = bot
         subapp["dp"] = dp
         subapp["scheduler"] = scheduler
+        subapp["update_pool"] = update_pool
+        subapp["update_dedup"] = update_dedup
         app.add_subapp(prefix, subapp)
     app["bot"] = bot
     app["dp"] = dp
     app["scheduler"] = scheduler
+    app["update_pool"] = update_pool
+    app["update_dedup"] = update_dedup
+    app.router.add_get("/metrics", utils.metrics.metrics_handler)
     app.on_startup.append(aiohttp_on_startup)
     app.on_shutdown.append(aiohttp_on_shutdown)
     return app
 
 
-def main() -> None:
-    bot = Bot(settings.BOT_TOKEN, parse_mode="HTML")
-
-    if settings.DEBUG:
+def create_bot() -> tuple[Bot, Dispatcher, Optional[Redis]]:  # type: ignore[type-arg]
+    # Several webhook workers must share FSM state and rate limits via Redis.
+    if settings.DEBUG and settings.WEBHOOK_WORKERS == 1:
+        redis = None
         storage = MemoryStorage()
     else:
+        redis = Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            password=settings.REDIS_PASSWORD,
+            db=settings.REDIS_STORAGE_DB,
+        )
         storage = RedisStorage(
-            redis=Redis(
-                host=settings.REDIS_HOST,
-                port=settings.REDIS_PORT,
-                password=settings.REDIS_PASSWORD,
-                db=settings.REDIS_STORAGE_DB,
-            ),
+            redis=redis,
             key_builder=DefaultKeyBuilder(with_bot_id=True, with_destiny=True),
         )
         # await redis.flushdb()
 
+    session = utils.smart_session.SmartAiogramAiohttpSession(
+        logger=structlog.get_logger(),
+        rate_limiter=utils.rate_limiter.RateLimiter(
+            redis=redis,
+            global_rate=settings.RATE_LIMIT_GLOBAL_PER_SECOND,
+            chat_rate=settings.RATE_LIMIT_CHAT_PER_SECOND,
+            group_rate_per_minute=settings.RATE_LIMIT_GROUP_PER_MINUTE,
+            logger=structlog.get_logger().bind(component="rate_limiter"),
+        ),
+    )
+    bot = Bot(settings.BOT_TOKEN, session=session, parse_mode="HTML")
+
     dp = Dispatcher(storage=storage)
+    return bot, dp, redis
+
+
+def run_webhook_worker(worker_index: int = 0) -> None:
+    bot, dp, redis = create_bot()
+    dp["worker_index"] = worker_index
+    dp.startup.register(aiogram_on_startup_webhook)
+    dp.shutdown.register(aiogram_on_shutdown_webhook)
+    web.run_app(
+        setup_aiohttp_app(bot, dp, redis),
+        handle_signals=True,
+        host=settings.MAIN_WEBHOOK_LISTENING_HOST,
+        port=settings.MAIN_WEBHOOK_LISTENING_PORT,
+        reuse_port=settings.WEBHOOK_WORKERS > 1,
+    )
+
+
+def run_webhook_workers() -> None:
+    """
+    Fork WEBHOOK_WORKERS webhook servers sharing one port via SO_REUSEPORT.
+
+    The kernel spreads incoming connections between the workers. SIGTERM is
+    forwarded to all of them, and if one exits the others are stopped too so
+    the supervisor restarts the whole group.
+    """
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        for path in glob.glob(os.path.join(multiproc_dir, "*.db")):
+            os.remove(path)
+    ctx = multiprocessing.get_context("fork")
+    workers = [
+        ctx.Process(target=run_webhook_worker, args=(i,), name=f"webhook-worker-{i}")
+        for i in range(settings.WEBHOOK_WORKERS)
+    ]
+    for worker in workers:
+        worker.start()
+
+    def stop_workers(*_: Any) -> None:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+
+    # Ctrl+C already reaches every worker through the process group.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, stop_workers)
+    multiprocessing.connection.wait([worker.sentinel for worker in workers])
+    stop_workers()
+    for worker in workers:
+        worker.join()
+        if multiproc_dir:
+            prometheus_client.multiprocess.mark_process_dead(  # type: ignore[no-untyped-call]
+                worker.pid
+            )
+    sys.exit(max(abs(worker.exitcode or 0) for worker in workers))
 
+
+def main() -> None:
+    setup_logging()
     if settings.USE_WEBHOOK:
-        dp.startup.register(aiogram_on_startup_webhook)
-        dp.shutdown.register(aiogram_on_shutdown_webhook)
-        web.run_app(
-            asyncio.run(setup_aiohttp_app(bot, dp)),
-            handle_signals=True,
-            host=settings.MAIN_WEBHOOK_LISTENING_HOST,
-            port=settings.MAIN_WEBHOOK_LISTENING_PORT,
-        )
+        if settings.WEBHOOK_WORKERS > 1:
+            run_webhook_workers()
+        else:
+            run_webhook_worker()
     else:
+        bot, dp, _ = create_bot()
         dp.startup.register(aiogram_on_startup_polling)
         dp.shutdown.register(aiogram_on_shutdown_polling)
         asyncio.run(dp.start_polling(bot))
@@ -21,6 +21,9 @@ class DefaultSettings(BaseSettings):
         if isinstance(v, int):
             return v
 
+    # Share of successful API calls and updates that get logged.
+    LOG_SAMPLE_RATE: float = Field(default=1.0, ge=0, le=1)
+
     USE_WEBHOOK: bool = Field(default=False)
 
     MAIN_WEBHOOK_ADDRESS: Optional[str] = Field(default=None)
@@ -28,8 +31,12 @@ class DefaultSettings(BaseSettings):
 
     MAIN_WEBHOOK_LISTENING_HOST: Optional[str] = Field(default=None)
     MAIN_WEBHOOK_LISTENING_PORT: Optional[int] = Field(default=None)
+    WEBHOOK_WORKERS: int = Field(default=1, gt=0)
 
-    MAX_UPDATES_IN_QUEUE: Optional[int] = Field(default=None)
+    MAX_UPDATES_IN_QUEUE: int = Field(default=10000, gt=0)
+    UPDATE_WORKERS: int = Field(default=16, gt=0)
+    UPDATE_DEDUP_TTL: int = Field(default=3600, gt=0)  # seconds
+    SHUTDOWN_DRAIN_TIMEOUT: float = Field(default=25, ge=0)  # seconds
 
     BOT_TOKEN: str = Field(default="need_token")
     BOT_API_URL: str = Field(default="http://localhost:8000/api")
@@ -45,6 +52,36 @@ class DefaultSettings(BaseSettings):
 
     REDIS_CACHE_DB: int = Field(default=5)
     REDIS_STORAGE_DB: int = Field(default=3)
+    REDIS_JOBS_DB: int = Field(default=4)
+
+    POSTGRES_HOST: str = "api-db"
+    POSTGRES_PORT: int = Field(default=5432)
+    POSTGRES_USER: str = "api"
+    POSTGRES_PASSWORD: str = "api"
+    POSTGRES_DB: str = "api"
+
+    RATE_LIMIT_GLOBAL_PER_SECOND: float = Field(default=30, gt=0)
+    RATE_LIMIT_CHAT_PER_SECOND: float = Field(default=1, gt=0)
+    RATE_LIMIT_GROUP_PER_MINUTE: float = Field(default=20, gt=0)
+
+    # Both need the jobs Redis (and reminders Postgres): off by default in DEBUG.
+    OUTBOX_ENABLED: bool = Field(default=None, validate_default=True)
+    OUTBOX_WORKERS: int = Field(default=4, gt=0)
+    OUTBOX_MAX_ATTEMPTS: int = Field(default=5, gt=0)
+    OUTBOX_RETRY_IDLE: float = Field(default=30, gt=0)  # seconds
+
+    BIRTHDAY_REMINDERS_ENABLED: bool = Field(default=None, validate_default=True)
+    BIRTHDAY_REMINDERS_HOUR: int = Field(default=9, ge=0, le=23)  # BIRTHDAY_TIMEZONE
+    # Must match BIRTHDAY_TIMEZONE of the API models, birthday_md is computed in it.
+    BIRTHDAY_TIMEZONE: str = Field(default="Europe/Moscow")
+    BIRTHDAY_REMINDERS_BATCH_SIZE: int = Field(default=1000, gt=0)
+    BIRTHDAY_REMINDERS_CONCURRENCY: int = Field(default=25, gt=0)
+
+    @field_validator("OUTBOX_ENABLED", "BIRTHDAY_REMINDERS_ENABLED", mode="before")
+    def enable_jobs(cls, v: Optional[bool], info: ValidationInfo) -> bool:
+        if v is None:
+            return not info.data.get("DEBUG")
+        return v
 
     # REDIS_URI: Optional[RedisDsn] = None
 
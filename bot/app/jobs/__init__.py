@@ -0,0 +1 @@
+from . import birthday_reminders as birthday_reminders
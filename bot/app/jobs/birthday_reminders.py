@@ -0,0 +1,298 @@
+import asyncio
+import calendar
+import datetime
+import html
+from typing import Optional, Sequence
+from zoneinfo import ZoneInfo
+
+import asyncpg
+import structlog.typing
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from aiogram.methods import SendMessage
+from aiogram.utils.keyboard import InlineKeyboardButton, InlineKeyboardMarkup, WebAppInfo
+from redis.asyncio import Redis
+from redis.exceptions import LockError
+
+from app.utils.chunks import chunks
+from app.utils.get_settings import get_settings
+from app.utils.outbox import Outbox
+
+settings = get_settings()
+
+# birthday_md is the indexed MMDD column maintained by the API migrations.
+SELECT_BIRTHDAYS = """
+SELECT id, chat_id, first_name, birthday_md
+FROM users
+WHERE birthday_md = ANY($1::smallint[]) AND id > $2
+ORDER BY id
+LIMIT $3
+"""
+
+LOCK_KEY = "birthday_reminders:lock"
+LOCK_TIMEOUT = 10 * 60
+CURSOR_KEY = "birthday_reminders:{day}:cursor"
+DONE_KEY = "birthday_reminders:{day}:done"
+SENT_KEY = "birthday_reminders:{day}:sent:{chat_id}"
+KEY_TTL = 2 * 24 * 60 * 60
+RETRY_DELAY = 60
+SEND_ATTEMPTS = 3
+SEND_RETRY_DELAY = 2
+
+TODAY_TEXT = "🎉 {name}, с днём рождения! Поделитесь ссылкой со своими друзьями."
+TOMORROW_TEXT = "🎂 {name}, завтра ваш день рождения! Самое время поделиться ссылкой с друзьями."
+
+
+def birthday_keys(day: datetime.date) -> list[int]:
+    """
+    MMDD values celebrated on ``day``.
+
+    Feb 29 is celebrated on Mar 1 in common years, the same rule the API
+    uses for days left to a birthday.
+    """
+    keys = [day.month * 100 + day.day]
+    if (day.month, day.day) == (3, 1) and not calendar.isleap(day.year):
+        keys.append(229)
+    return keys
+
+
+async def claim_chats(
+    redis: Redis,  # type: ignore[type-arg]
+    day: str,
+    records: Sequence[asyncpg.Record],
+) -> list[asyncpg.Record]:
+    # One SET NX per chat in a single round trip: a chat is only ever claimed
+    # once a day, so a restart in the middle of a batch never sends twice.
+    async with redis.pipeline(transaction=False) as pipe:
+        for record in records:
+            pipe.set(
+                SENT_KEY.format(day=day, chat_id=record["chat_id"]),
+                1,
+                nx=True,
+                ex=KEY_TTL,
+            )
+        claimed = await pipe.execute()
+    return [record for record, ok in zip(records, claimed, strict=True) if ok]
+
+
+async def release_chats(
+    redis: Redis,  # type: ignore[type-arg]
+    day: str,
+    records: Sequence[asyncpg.Record],
+) -> None:
+    """Drop the claims of ``records``, so a later run sends to them."""
+    if records:
+        await redis.delete(
+            *(SENT_KEY.format(day=day, chat_id=record["chat_id"]) for record in records)
+        )
+
+
+async def send_reminder(
+    bot: Bot,
+    logger: structlog.typing.FilteringBoundLogger,
+    record: asyncpg.Record,
+    is_today: bool,
+    outbox: Optional[Outbox] = None,
+) -> bool:
+    """
+    Send or queue one reminder.
+
+    :return: False if the chat can not get it; other errors are raised.
+    """
+    text = TODAY_TEXT if is_today else TOMORROW_TEXT
+    kb = InlineKeyboardMarkup(
+        inline_keyboard=[[
+            InlineKeyboardButton(text="Перейти", web_app=WebAppInfo(url=settings.WEB_APP_URL))
+        ]]
+    )
+    method = SendMessage(
+        chat_id=record["chat_id"],
+        text=text.format(name=html.escape(record["first_name"] or "Привет")),
+        reply_markup=kb,
+    )
+    try:
+        if outbox is None:
+            await bot(method)
+        else:
+            await outbox.enqueue(method)
+    except (TelegramForbiddenError, TelegramBadRequest) as e:
+        # Blocked the bot or the chat is gone: retrying will not help.
+        logger.info("Reminder not delivered", chat_id=record["chat_id"], error=e)
+        return False
+    return True
+
+
+async def send_reminders(
+    bot: Bot,
+    redis: Redis,  # type: ignore[type-arg]
+    logger: structlog.typing.FilteringBoundLogger,
+    day: str,
+    records: Sequence[asyncpg.Record],
+    targets: dict[int, bool],
+    outbox: Optional[Outbox] = None,
+) -> tuple[int, list[asyncpg.Record]]:
+    """
+    Send reminders to claimed chats, retrying the ones that failed.
+
+    Chats that still fail after ``SEND_ATTEMPTS`` are released, so the
+    next run claims them again. When sending is cancelled, every chat
+    that did not get its reminder is released before re-raising.
+
+    :return: number of reminders sent and records that failed.
+    """
+    sent = 0
+    done: set[int] = set()
+    pending = list(records)
+    failed: list[asyncpg.Record] = []
+    try:
+        for attempt in range(1, SEND_ATTEMPTS + 1):
+            failed = []
+            for chunk in chunks(pending, settings.BIRTHDAY_REMINDERS_CONCURRENCY):
+                results = await asyncio.gather(
+                    *(
+                        send_reminder(
+                            bot, logger, record, targets[record["birthday_md"]], outbox
+                        )
+                        for record in chunk
+                    ),
+                    return_exceptions=True,
+                )
+                cancelled: Optional[BaseException] = None
+                for record, result in zip(chunk, results, strict=True):
+                    if isinstance(result, Exception):
+                        logger.warning(
+                            "Reminder failed",
+                            chat_id=record["chat_id"],
+                            attempt=attempt,
+                            error=result,
+                        )
+                        failed.append(record)
+                    elif isinstance(result, BaseException):
+                        cancelled = result
+                    else:
+                        sent += result
+                        done.add(record["chat_id"])
+                if cancelled is not None:
+                    raise cancelled
+            if not failed:
+                break
+            pending = failed
+            if attempt < SEND_ATTEMPTS:
+                await asyncio.sleep(SEND_RETRY_DELAY * attempt)
+    except BaseException:
+        await release_chats(
+            redis, day, [record for record in records if record["chat_id"] not in done]
+        )
+        raise
+
+    await release_chats(redis, day, failed)
+    return sent, failed
+
+
+async def run_birthday_reminders(
+    bot: Bot,
+    db_pool: asyncpg.Pool,
+    redis: Redis,  # type: ignore[type-arg]
+    logger: structlog.typing.FilteringBoundLogger,
+    today: datetime.date,
+    outbox: Optional[Outbox] = None,
+) -> bool:
+    """
+    Send reminders to users whose birthday is today or tomorrow.
+
+    Reminders are queued to ``outbox`` when given, else sent directly.
+    Users are read in keyset batches over the birthday_md index. The last
+    processed id is saved after every batch, so a restarted run resumes
+    where it stopped instead of rescanning. A batch with reminders that
+    failed every attempt stops the run before the cursor moves past it.
+
+    :return: False if the run did not finish: another process holds the
+        run lock or some reminders could not be sent.
+    """
+    day = today.isoformat()
+    if await redis.exists(DONE_KEY.format(day=day)):
+        return True
+
+    lock = redis.lock(LOCK_KEY, timeout=LOCK_TIMEOUT)
+    if not await lock.acquire(blocking=False):
+        logger.info("Birthday reminders are running elsewhere", day=day)
+        return False
+
+    # Tomorrow goes first so today's keys win if the two ever overlap.
+    targets = {key: False for key in birthday_keys(today + datetime.timedelta(days=1))}
+    targets.update({key: True for key in birthday_keys(today)})
+    last_id = int(await redis.get(CURSOR_KEY.format(day=day)) or 0)
+    sent = 0
+    st = asyncio.get_running_loop().time()
+    try:
+        while True:
+            records = await db_pool.fetch(
+                SELECT_BIRTHDAYS,
+                list(targets),
+                last_id,
+                settings.BIRTHDAY_REMINDERS_BATCH_SIZE,
+            )
+            if not records:
+                break
+            claimed = await claim_chats(redis, day, records)
+            batch_sent, failed = await send_reminders(
+                bot, redis, logger, day, claimed, targets, outbox
+            )
+            sent += batch_sent
+            if failed:
+                logger.error(
+                    "Birthday reminders interrupted",
+                    day=day,
+                    failed=len(failed),
+                    last_id=last_id,
+                )
+                return False
+            last_id = records[-1]["id"]
+            await redis.set(CURSOR_KEY.format(day=day), last_id, ex=KEY_TTL)
+            await lock.reacquire()
+        await redis.set(DONE_KEY.format(day=day), 1, ex=KEY_TTL)
+    finally:
+        try:
+            await lock.release()
+        except LockError:
+            pass
+    logger.info(
+        "Birthday reminders sent",
+        day=day,
+        sent=sent,
+        time_spent_ms=(asyncio.get_running_loop().time() - st) * 1000,
+    )
+    return True
+
+
+async def birthday_reminders_job(
+    bot: Bot,
+    db_pool: asyncpg.Pool,
+    redis: Redis,  # type: ignore[type-arg]
+    logger: structlog.typing.FilteringBoundLogger,
+    outbox: Optional[Outbox] = None,
+) -> None:
+    """Run the reminders once a day at ``BIRTHDAY_REMINDERS_HOUR`` in the birthday timezone."""
+    tz = ZoneInfo(settings.BIRTHDAY_TIMEZONE)
+    run_time = datetime.time(settings.BIRTHDAY_REMINDERS_HOUR)
+    while True:
+        now = datetime.datetime.now(tz)
+        run_at = datetime.datetime.combine(now.date(), run_time, tzinfo=tz)
+        if now < run_at:
+            await asyncio.sleep((run_at - now).total_seconds())
+            continue
+        try:
+            finished = await run_birthday_reminders(
+                bot, db_pool, redis, logger, now.date(), outbox
+            )
+        except Exception as e:
+            logger.error("Birthday reminders failed", error=e)
+            finished = False
+        if not finished:
+            await asyncio.sleep(RETRY_DELAY)
+            continue
+        next_run = datetime.datetime.combine(
+            now.date() + datetime.timedelta(days=1), run_time, tzinfo=tz
+        )
+        now = datetime.datetime.now(tz)
+        await asyncio.sleep(max((next_run - now).total_seconds(), 0))
@@ -5,6 +5,9 @@ import structlog.typing
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject, Update
 
+from app.utils.log_sampling import sampled
+from app.utils.metrics import UPDATE_HANDLER_SECONDS
+
 HANDLED_STR = ["Unhandled", "Handled"]
 
 
@@ -20,6 +23,15 @@ class StructLoggingMiddleware(BaseMiddleware):
         data: dict[str, Any],
     ) -> Any:
         event = cast(Update, event)
+        if not sampled():
+            # Nothing is bound or rendered for unsampled updates.
+            st = time.monotonic()
+            try:
+                return await handler(event, data)
+            finally:
+                UPDATE_HANDLER_SECONDS.labels(event.event_type).observe(
+                    time.monotonic() - st
+                )
         _started_processing_at = time.time()
         logger = self.logger.bind(update_id=event.update_id)
         if event.message:
@@ -93,7 +105,13 @@ class StructLoggingMiddleware(BaseMiddleware):
                 new_state=upd.new_chat_member,
             )
             logger.debug("Received chat member update")
-        await handler(event, data)
+        # Failures are logged once, by whoever feeds the update: the update
+        # pool for webhooks, the dispatcher for polling.
+        st = time.monotonic()
+        try:
+            result = await handler(event, data)
+        finally:
+            UPDATE_HANDLER_SECONDS.labels(event.event_type).observe(time.monotonic() - st)
         logger = logger.bind(
             process_result=True,
             spent_time_ms=round((time.time() - _started_processing_at) * 10000) / 10,
@@ -108,4 +126,4 @@ class StructLoggingMiddleware(BaseMiddleware):
             logger.info("Handled my chat member update")
         elif event.chat_member:
             logger.info("Handled chat member update")
-        return
+        return result
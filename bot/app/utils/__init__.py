@@ -1,3 +1,9 @@
 from . import chunks as chunks
 from . import connect_to_services as connect_to_services
+from . import log_sampling as log_sampling
+from . import metrics as metrics
+from . import outbox as outbox
+from . import rate_limiter as rate_limiter
 from . import smart_session as smart_session
+from . import update_dedup as update_dedup
+from . import update_pool as update_pool
@@ -1,3 +1,5 @@
+from typing import Optional
+
 import asyncpg
 import redis
 import structlog
@@ -83,7 +85,7 @@ async def wait_redis_pool(
     logger: structlog.typing.FilteringBoundLogger,
     host: str,
     port: int,
-    password: str,
+    password: Optional[str],
     database: int,
 ) -> redis.asyncio.Redis:  # type: ignore[type-arg]
     redis_pool: redis.asyncio.Redis = Redis(  # type: ignore[type-arg]
@@ -1,12 +1,14 @@
 """Functions for app settings."""
 
+from functools import lru_cache
 from os import environ
 
 from app.data.config import DefaultSettings
 
 
+@lru_cache
 def get_settings() -> DefaultSettings:
-    """Return actual settings for app."""
+    """Return actual settings for app, read once per process."""
     env = environ.get("ENV", "local")
     if env == "local":
         return DefaultSettings()
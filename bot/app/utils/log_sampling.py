@@ -0,0 +1,20 @@
+import logging
+import random
+
+from app.utils.get_settings import get_settings
+
+
+def debug_enabled() -> bool:
+    """Whether debug records are emitted, to skip building them otherwise."""
+    return get_settings().LOGGING_LEVEL <= logging.DEBUG
+
+
+def sampled() -> bool:
+    """Keep roughly LOG_SAMPLE_RATE of success-path records; errors bypass this."""
+    rate = get_settings().LOG_SAMPLE_RATE
+    return rate >= 1 or random.random() < rate
+
+
+def redact_token(value: object, token: str) -> str:
+    """Render ``value`` with the bot token replaced by its public bot id."""
+    return str(value).replace(token, f"{token.split(':')[0]}:<redacted>")
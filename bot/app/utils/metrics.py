@@ -0,0 +1,105 @@
+import asyncio
+import os
+from typing import Optional
+
+import aiojobs
+from aiohttp import web
+from prometheus_client import (
+    CollectorRegistry,
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    generate_latest,
+    Histogram,
+    multiprocess,
+    REGISTRY,
+)
+
+from app.utils.update_pool import UpdateWorkerPool
+
+# With several webhook workers PROMETHEUS_MULTIPROC_DIR must point to a shared
+# empty directory; every worker then writes its samples there and /metrics
+# on any of them reports the sum.
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+UPDATE_HANDLER_SECONDS = Histogram(
+    "bot_update_handler_duration_seconds",
+    "Time spent handling an update.",
+    ["update_type"],
+)
+API_REQUEST_SECONDS = Histogram(
+    "bot_api_request_duration_seconds",
+    "Latency of Telegram Bot API requests.",
+    ["method"],
+)
+API_ERRORS = Counter(
+    "bot_api_errors_total",
+    "Telegram Bot API requests that raised.",
+    ["method", "error"],
+)
+API_RETRIES = Counter(
+    "bot_api_retries_total",
+    "Telegram Bot API requests retried by the session.",
+    ["method", "reason"],
+)
+API_RATE_LIMITED = Counter(
+    "bot_api_rate_limited_total",
+    "Telegram Bot API requests answered with 429.",
+    ["method"],
+)
+SCHEDULER_JOBS = Gauge(
+    "bot_scheduler_jobs",
+    "Jobs in the aiojobs scheduler.",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+UPDATE_QUEUE_DEPTH = Gauge(
+    "bot_update_queue_depth",
+    "Updates waiting in the webhook worker pool.",
+    ["shard"],
+    multiprocess_mode="livesum",
+)
+UPDATE_QUEUE_LAG = Gauge(
+    "bot_update_queue_lag_seconds",
+    "How long the last update taken by a shard had waited.",
+    ["shard"],
+    multiprocess_mode="livemax",
+)
+UPDATES_DEDUPLICATED = Counter(
+    "bot_updates_deduplicated_total",
+    "Redelivered updates acknowledged without processing.",
+)
+
+REFRESH_INTERVAL = 5
+
+
+def refresh_gauges(app: web.Application) -> None:
+    """Copy the current scheduler and update queue state into the gauges."""
+    scheduler: Optional[aiojobs.Scheduler] = app.get("scheduler")
+    if scheduler is not None:
+        SCHEDULER_JOBS.labels("active").set(scheduler.active_count)
+        SCHEDULER_JOBS.labels("pending").set(scheduler.pending_count)
+    update_pool: Optional[UpdateWorkerPool] = app.get("update_pool")
+    if update_pool is not None:
+        for shard, stats in enumerate(update_pool.stats()["shards"]):
+            UPDATE_QUEUE_DEPTH.labels(shard).set(stats["depth"])
+            UPDATE_QUEUE_LAG.labels(shard).set(stats["lag_ms"] / 1000)
+
+
+async def refresh_gauges_job(app: web.Application) -> None:
+    # Other workers' gauges are only as fresh as their last refresh.
+    while True:
+        refresh_gauges(app)
+        await asyncio.sleep(REFRESH_INTERVAL)
+
+
+async def metrics_handler(req: web.Request) -> web.Response:
+    refresh_gauges(req.app)
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)  # type: ignore[no-untyped-call]
+    else:
+        registry = REGISTRY
+    return web.Response(
+        body=generate_latest(registry), headers={"Content-Type": CONTENT_TYPE_LATEST}
+    )
@@ -0,0 +1,155 @@
+import asyncio
+import os
+import socket
+from typing import Any, Optional
+
+import orjson
+import structlog.typing
+from aiogram import Bot, methods
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from aiogram.methods.base import TelegramMethod
+from redis.asyncio import Redis
+from redis.typing import EncodableT, FieldT
+
+# Errors that will not go away on retry: the entry goes straight to dead letters.
+PERMANENT_ERRORS = (TelegramBadRequest, TelegramForbiddenError)
+
+
+class Outbox:
+    """
+    Persistent queue of outgoing bot requests on a Redis Stream.
+
+    Producers call :meth:`enqueue` with any aiogram method; workers started
+    with :meth:`run_worker` read the stream through a consumer group and ack
+    an entry only after it was delivered. Failed entries stay pending and are
+    reclaimed by any worker after ``retry_idle`` seconds, so entries in flight
+    during a restart are delivered by the next process. After ``max_attempts``
+    deliveries, or on an error that retrying cannot fix, the entry is moved
+    to the dead-letter stream.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,  # type: ignore[type-arg]
+        logger: structlog.typing.FilteringBoundLogger,
+        stream: str = "outbox",
+        group: str = "outbox-workers",
+        dead_letter_stream: str = "outbox:dead",
+        max_attempts: int = 5,
+        retry_idle: float = 30,
+        maxlen: int = 1_000_000,
+        batch_size: int = 50,
+    ):
+        self._redis = redis
+        self._logger = logger
+        self.stream = stream
+        self.group = group
+        self.dead_letter_stream = dead_letter_stream
+        self._max_attempts = max_attempts
+        self._retry_idle_ms = int(retry_idle * 1000)
+        self._maxlen = maxlen
+        self._batch_size = batch_size
+
+    async def setup(self) -> None:
+        try:
+            await self._redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise e
+
+    async def enqueue(self, method: TelegramMethod[Any]) -> str:
+        payload = method.model_dump(mode="json", exclude_unset=True, exclude_none=True)
+        entry_id: bytes | str = await self._redis.xadd(
+            self.stream,
+            {"method": type(method).__name__, "payload": orjson.dumps(payload)},
+            maxlen=self._maxlen,
+            approximate=True,
+        )
+        return entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+
+    @staticmethod
+    def _load(fields: dict[bytes, bytes]) -> TelegramMethod[Any]:
+        method_cls = getattr(methods, fields[b"method"].decode())
+        return method_cls(**orjson.loads(fields[b"payload"]))  # type: ignore[no-any-return]
+
+    async def _dead_letter(self, entry_id: bytes, fields: dict[bytes, bytes], error: str) -> None:
+        entry: dict[FieldT, EncodableT] = {key: value for key, value in fields.items()}
+        entry.update({b"entry_id": entry_id, b"error": error})
+        await self._redis.xadd(
+            self.dead_letter_stream,
+            entry,
+            maxlen=self._maxlen,
+            approximate=True,
+        )
+        await self._ack(entry_id)
+
+    async def _ack(self, entry_id: bytes) -> None:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.xack(self.stream, self.group, entry_id)
+            pipe.xdel(self.stream, entry_id)
+            await pipe.execute()
+
+    async def _attempts(self, entry_id: bytes) -> int:
+        pending = await self._redis.xpending_range(
+            self.stream, self.group, min=entry_id, max=entry_id, count=1
+        )
+        return int(pending[0]["times_delivered"]) if pending else 0
+
+    async def _deliver(
+        self,
+        bot: Bot,
+        entry_id: bytes,
+        fields: dict[bytes, bytes],
+        attempts: Optional[int] = None,
+    ) -> None:
+        logger = self._logger.bind(entry_id=entry_id, method=fields.get(b"method"))
+        if attempts is not None and attempts > self._max_attempts:
+            logger.error("Outbox entry exhausted its attempts", attempts=attempts)
+            await self._dead_letter(entry_id, fields, "max attempts exceeded")
+            return
+        try:
+            await bot(self._load(fields))
+        except PERMANENT_ERRORS as e:
+            logger.info("Outbox entry rejected", error=e)
+            await self._dead_letter(entry_id, fields, str(e))
+        except Exception as e:
+            # Left pending: reclaimed and retried after retry_idle.
+            logger.warning("Outbox delivery failed", error=e)
+        else:
+            await self._ack(entry_id)
+
+    async def _process(self, bot: Bot, consumer: str) -> None:
+        _, claimed, *_ = await self._redis.xautoclaim(
+            self.stream,
+            self.group,
+            consumer,
+            min_idle_time=self._retry_idle_ms,
+            start_id="0-0",
+            count=self._batch_size,
+        )
+        for entry_id, fields in claimed:
+            if fields is None:  # deleted while pending
+                await self._ack(entry_id)
+                continue
+            await self._deliver(bot, entry_id, fields, await self._attempts(entry_id))
+
+        response = await self._redis.xreadgroup(
+            self.group,
+            consumer,
+            {self.stream: ">"},
+            count=self._batch_size,
+            block=min(self._retry_idle_ms, 5000),
+        )
+        for _, entries in response:
+            await asyncio.gather(
+                *(self._deliver(bot, entry_id, fields) for entry_id, fields in entries)
+            )
+
+    async def run_worker(self, bot: Bot, consumer: Optional[str] = None) -> None:
+        consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        while True:
+            try:
+                await self._process(bot, consumer)
+            except Exception as e:
+                self._logger.error("Outbox worker error", consumer=consumer, error=e)
+                await asyncio.sleep(1)
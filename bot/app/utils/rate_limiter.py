@@ -0,0 +1,134 @@
+import asyncio
+import math
+import time
+from typing import Optional, Union
+
+import structlog
+import structlog.typing
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+ChatId = Union[int, str]
+
+# Reserves the next send slot of one bucket (GCRA with no burst): the key
+# stores the earliest time its next request may go out, in ms of Redis time.
+# Returns how long the caller has to wait for the reserved slot.
+RESERVE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local at = math.max(now, tonumber(redis.call('GET', KEYS[1]) or 0))
+local interval = tonumber(ARGV[1])
+redis.call('SET', KEYS[1], at + interval, 'PX', at - now + interval)
+return at - now
+"""
+
+# Pushes a key's next slot at least ``ARGV[1]`` ms into the future.
+PENALIZE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local at = now + tonumber(ARGV[1])
+if at > tonumber(redis.call('GET', KEYS[1]) or 0) then
+    redis.call('SET', KEYS[1], at, 'PX', ARGV[1])
+end
+return 0
+"""
+
+
+class RateLimiter:
+    """
+    Paces outgoing Telegram requests before they are sent.
+
+    Every request with a ``chat_id`` waits for a slot in its chat bucket and
+    then in the global bucket: private chats get ``chat_rate`` per second,
+    groups and channels ``group_rate_per_minute`` per minute. The global slot
+    is reserved only once the chat slot is due, at the time the request
+    really goes out, so a throttled chat neither holds back other chats nor
+    lets delayed requests burst over the global rate. Slots are reserved, so
+    concurrent senders queue up in order instead of polling. With ``redis``
+    the reservations are shared between all bot processes; while Redis is
+    unavailable every process paces its own requests.
+    """
+
+    MAX_LOCAL_KEYS = 10000
+
+    def __init__(
+        self,
+        redis: Optional[Redis] = None,  # type: ignore[type-arg]
+        global_rate: float = 30,
+        chat_rate: float = 1,
+        group_rate_per_minute: float = 20,
+        key_prefix: str = "tg_rate_limit",
+        logger: Optional[structlog.typing.FilteringBoundLogger] = None,
+    ):
+        self._redis = redis
+        self._logger = logger or structlog.get_logger()
+        self._redis_failing = False
+        self._global_interval = math.ceil(1000 / global_rate)
+        self._chat_interval = math.ceil(1000 / chat_rate)
+        self._group_interval = math.ceil(60000 / group_rate_per_minute)
+        self._prefix = key_prefix
+        self._global_key = f"{key_prefix}:global"
+        self._local: dict[str, float] = {}
+        if redis is not None:
+            self._reserve_script = redis.register_script(RESERVE_SCRIPT)
+            self._penalize_script = redis.register_script(PENALIZE_SCRIPT)
+
+    def _chat_key(self, chat_id: ChatId) -> tuple[str, int]:
+        if isinstance(chat_id, str) or chat_id < 0:
+            return f"{self._prefix}:group:{chat_id}", self._group_interval
+        return f"{self._prefix}:chat:{chat_id}", self._chat_interval
+
+    async def acquire(self, chat_id: Optional[ChatId]) -> None:
+        if chat_id is None:
+            return
+        await self._wait(*self._chat_key(chat_id))
+        await self._wait(self._global_key, self._global_interval)
+
+    async def penalize(self, chat_id: Optional[ChatId], retry_after: float) -> None:
+        """Hold back a chat (or everything, without a chat) after a 429."""
+        key = self._global_key if chat_id is None else self._chat_key(chat_id)[0]
+        ms = math.ceil(retry_after * 1000)
+        if self._redis is not None:
+            try:
+                await self._penalize_script(keys=[key], args=[ms])
+            except RedisError as e:
+                self._redis_failed(e)
+            else:
+                self._redis_ok()
+                return
+        now = time.monotonic() * 1000
+        self._local[key] = max(self._local.get(key, 0), now + ms)
+
+    async def _wait(self, key: str, interval: int) -> None:
+        delay = await self._reserve(key, interval)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _reserve(self, key: str, interval: int) -> float:
+        if self._redis is not None:
+            try:
+                delay_ms = await self._reserve_script(keys=[key], args=[interval])
+            except RedisError as e:
+                self._redis_failed(e)
+            else:
+                self._redis_ok()
+                return float(delay_ms) / 1000
+        return self._reserve_local(key, interval)
+
+    def _reserve_local(self, key: str, interval: int) -> float:
+        now = time.monotonic() * 1000
+        if len(self._local) > self.MAX_LOCAL_KEYS:
+            self._local = {k: tat for k, tat in self._local.items() if tat > now}
+        at = max(now, self._local.get(key, 0))
+        self._local[key] = at + interval
+        return (at - now) / 1000
+
+    def _redis_failed(self, error: RedisError) -> None:
+        if not self._redis_failing:
+            self._logger.warning("Rate limiter is running without Redis", error=error)
+        self._redis_failing = True
+
+    def _redis_ok(self) -> None:
+        if self._redis_failing:
+            self._logger.info("Rate limiter is back on Redis")
+        self._redis_failing = False
@@ -12,6 +12,15 @@ from aiogram.exceptions import (
 )
 from aiogram.methods.base import TelegramMethod, TelegramType
 
+from app.utils.log_sampling import debug_enabled, redact_token, sampled
+from app.utils.metrics import (
+    API_ERRORS,
+    API_RATE_LIMITED,
+    API_REQUEST_SECONDS,
+    API_RETRIES,
+)
+from app.utils.rate_limiter import RateLimiter
+
 
 class StructLogAiogramAiohttpSessions(AiohttpSession):
     def __init__(self, logger: structlog.typing.FilteringBoundLogger, **kwargs: Any):
@@ -24,51 +33,82 @@ class StructLogAiogramAiohttpSessions(AiohttpSession):
         method: TelegramMethod[TelegramType],
         timeout: Optional[int] = None,
     ) -> TelegramType:
+        # Payloads are only dumped when the record is actually emitted.
+        verbose = debug_enabled() and sampled()
         req_logger = self._logger.bind(
-            bot=bot.token,
-            method=method.model_dump(exclude_none=True, exclude_unset=True),
+            bot_id=bot.id,
+            method=method.__api_method__,
             timeout=timeout,
-            api=self.api,
-            url=self.api.api_url(bot.token, method.__api_method__),
         )
+        if verbose:
+            req_logger = req_logger.bind(
+                params=method.model_dump(exclude_none=True, exclude_unset=True),
+                url=redact_token(self.api.api_url(bot.token, method.__api_method__), bot.token),
+            )
+            req_logger.debug("Making request to API")
         st = time.monotonic()
-        req_logger.debug("Making request to API")
         try:
             res = await super().make_request(bot, method, timeout)
         except Exception as e:
+            API_REQUEST_SECONDS.labels(method.__api_method__).observe(time.monotonic() - st)
+            API_ERRORS.labels(method.__api_method__, type(e).__name__).inc()
             req_logger.error(
                 "API error",
-                error=e,
+                chat_id=getattr(method, "chat_id", None),
+                error=redact_token(repr(e), bot.token),
                 time_spent_ms=(time.monotonic() - st) * 1000,
             )
             raise e
-        req_logger.debug(
-            "API response",
-            response=(
-                res.model_dump(exclude_none=True, exclude_unset=True)
-                if hasattr(res, "model_dump")
-                else res
-            ),
-            time_spent_ms=(time.monotonic() - st) * 1000,
-        )
+        API_REQUEST_SECONDS.labels(method.__api_method__).observe(time.monotonic() - st)
+        if verbose:
+            req_logger.debug(
+                "API response",
+                response=(
+                    res.model_dump(exclude_none=True, exclude_unset=True)
+                    if hasattr(res, "model_dump")
+                    else res
+                ),
+                time_spent_ms=(time.monotonic() - st) * 1000,
+            )
         return res
 
 
 class SmartAiogramAiohttpSession(StructLogAiogramAiohttpSessions):
+    MAX_RETRY_AFTER_ATTEMPTS = 5
+
+    def __init__(
+        self,
+        logger: structlog.typing.FilteringBoundLogger,
+        rate_limiter: Optional[RateLimiter] = None,
+        **kwargs: Any,
+    ):
+        super().__init__(logger, **kwargs)
+        self._rate_limiter = rate_limiter or RateLimiter()
+
     async def make_request(
         self,
         bot: Bot,
         method: TelegramMethod[TelegramType],
         timeout: Optional[int] = None,
     ) -> TelegramType:
+        chat_id = getattr(method, "chat_id", None)
         attempt = 0
+        retry_after_attempt = 0
         while True:
             attempt += 1
+            await self._rate_limiter.acquire(chat_id)
             try:
                 res = await super().make_request(bot, method, timeout)
             except TelegramRetryAfter as e:
-                await asyncio.sleep(e.retry_after)
+                # The limiter schedules the retry, so only this chat waits.
+                API_RATE_LIMITED.labels(method.__api_method__).inc()
+                retry_after_attempt += 1
+                if retry_after_attempt > self.MAX_RETRY_AFTER_ATTEMPTS:
+                    raise e
+                await self._rate_limiter.penalize(chat_id, e.retry_after)
+                API_RETRIES.labels(method.__api_method__, "retry_after").inc()
             except (RestartingTelegram, TelegramServerError):
+                API_RETRIES.labels(method.__api_method__, "server_error").inc()
                 if attempt > 6:
                     sleepy_time = 64
                 else:
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+from typing import Optional
+
+import structlog.typing
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.utils.metrics import UPDATES_DEDUPLICATED
+
+
+class UpdateDeduplicator:
+    """
+    Recognizes webhook updates that Telegram delivered more than once.
+
+    Recent update ids are kept in a small in-process LRU, so most retries
+    are caught without a network call. With ``redis`` the first sighting is
+    also claimed with ``SET NX EX``, which catches retries that land on
+    another process. Redis errors fall back to the LRU alone. An update
+    that could not be handled after all is given back with :meth:`release`,
+    so Telegram's retry of it is not taken for a duplicate.
+    """
+
+    def __init__(
+        self,
+        logger: structlog.typing.FilteringBoundLogger,
+        redis: Optional[Redis] = None,  # type: ignore[type-arg]
+        ttl: int = 3600,
+        maxsize: int = 10000,
+        key_prefix: str = "tg_update",
+    ):
+        self._logger = logger
+        self._redis = redis
+        self._ttl = ttl
+        self._maxsize = maxsize
+        self._prefix = key_prefix
+        self._recent: OrderedDict[int, None] = OrderedDict()
+        self.suppressed = 0
+
+    def _remember(self, update_id: int) -> None:
+        self._recent[update_id] = None
+        if len(self._recent) > self._maxsize:
+            self._recent.popitem(last=False)
+
+    async def is_duplicate(self, update_id: int) -> bool:
+        if update_id in self._recent:
+            self._recent.move_to_end(update_id)
+            self.suppressed += 1
+            UPDATES_DEDUPLICATED.inc()
+            return True
+        self._remember(update_id)
+        if self._redis is None:
+            return False
+        try:
+            claimed = await self._redis.set(
+                f"{self._prefix}:{update_id}", 1, nx=True, ex=self._ttl
+            )
+        except RedisError as e:
+            self._logger.warning("Update dedup is running without Redis", error=e)
+            return False
+        if not claimed:
+            self.suppressed += 1
+            UPDATES_DEDUPLICATED.inc()
+            return True
+        return False
+
+    async def release(self, update_id: int) -> None:
+        self._recent.pop(update_id, None)
+        if self._redis is None:
+            return
+        try:
+            await self._redis.delete(f"{self._prefix}:{update_id}")
+        except RedisError as e:
+            self._logger.warning("Update dedup is running without Redis", error=e)
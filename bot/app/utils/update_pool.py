@@ -0,0 +1,134 @@
+import asyncio
+import time
+from typing import Any, Optional
+
+import structlog.typing
+from aiogram import Bot, Dispatcher
+
+
+def update_chat_key(update: dict[str, Any]) -> int:
+    """
+    Id that orders a raw update: its chat, else its sender, else itself.
+
+    A malformed update gets 0; the worker rejects it when validating.
+    """
+    try:
+        return _update_chat_key(update)
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return 0
+
+
+def _update_chat_key(update: dict[str, Any]) -> int:
+    for event_type, event in update.items():
+        if event_type == "update_id" or not isinstance(event, dict):
+            continue
+        chat = event.get("chat") or (event.get("message") or {}).get("chat")
+        if chat is not None:
+            return int(chat["id"])
+        user = event.get("from")
+        if user is not None:
+            return int(user["id"])
+    return int(update["update_id"])
+
+
+class UpdateWorkerPool:
+    """
+    Fixed pool of update workers fed by queues sharded by chat.
+
+    Every shard has one bounded queue and one worker, so updates from the
+    same chat are handled in the order they arrived while different chats
+    are handled in parallel. Updates are queued as raw JSON and validated by
+    the worker, off the webhook request path. :meth:`submit` never waits: when the shard is
+    full it returns False and the caller can ask Telegram to retry later.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        dp: Dispatcher,
+        logger: structlog.typing.FilteringBoundLogger,
+        shards: int = 16,
+        max_queued: int = 10000,
+    ):
+        self._bot = bot
+        self._dp = dp
+        self._logger = logger
+        self._queues: list[asyncio.Queue[tuple[float, dict[str, Any]]]] = [
+            asyncio.Queue(maxsize=max(max_queued // shards, 1)) for _ in range(shards)
+        ]
+        self._lag = [0.0] * shards
+        self._in_flight = 0
+        self._workers: list[asyncio.Task[None]] = []
+        self._closed = False
+
+    def start(self) -> None:
+        self._workers = [
+            asyncio.create_task(self._work(shard)) for shard in range(len(self._queues))
+        ]
+
+    def submit(self, update: dict[str, Any]) -> bool:
+        queue = self._queues[update_chat_key(update) % len(self._queues)]
+        try:
+            queue.put_nowait((time.monotonic(), update))
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def _work(self, shard: int) -> None:
+        queue = self._queues[shard]
+        while True:
+            queued_at, update = await queue.get()
+            self._lag[shard] = time.monotonic() - queued_at
+            self._in_flight += 1
+            try:
+                await self._dp.feed_webhook_update(self._bot, update)
+            except Exception as e:
+                self._logger.error(
+                    "Update processing failed", update_id=update.get("update_id"), error=e
+                )
+            finally:
+                self._in_flight -= 1
+                queue.task_done()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def depth(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "depth": self.depth,
+            "shards": [
+                {"depth": queue.qsize(), "lag_ms": round(lag * 1000, 1) if queue.qsize() else 0}
+                for queue, lag in zip(self._queues, self._lag, strict=True)
+            ],
+        }
+
+    async def close(self, timeout: Optional[float] = None) -> int:
+        """
+        Drain the pool: refuse new updates, wait up to ``timeout`` seconds for
+        the queued ones, then cancel whatever is left.
+
+        :return: number of updates that were queued or running when cancelled.
+        """
+        self._closed = True
+        st = time.monotonic()
+        drained = asyncio.gather(*(queue.join() for queue in self._queues))
+        try:
+            await asyncio.wait_for(drained, timeout)
+        except asyncio.TimeoutError:
+            pass
+        abandoned = self.depth + self._in_flight
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        log = self._logger.warning if abandoned else self._logger.info
+        log(
+            "Update pool drained",
+            drain_time_ms=round((time.monotonic() - st) * 1000, 1),
+            abandoned=abandoned,
+        )
+        return abandoned
@@ -1,40 +1,59 @@
 import secrets
 
 import aiohttp.web
-import aiojobs
-from aiogram import Bot, Dispatcher, types
+import orjson
 from aiohttp import web
 
 from app.utils.get_settings import get_settings
+from app.utils.update_dedup import UpdateDeduplicator
+from app.utils.update_pool import UpdateWorkerPool
 
 tg_updates_app = web.Application()
+settings = get_settings()
 
 
-async def process_update(upd: types.Update, bot: Bot, dp: Dispatcher) -> None:
-    await dp.feed_webhook_update(bot, upd)
+def check_token(req: web.Request) -> None:
+    if not secrets.compare_digest(req.match_info["token"], settings.BOT_TOKEN):
+        raise aiohttp.web.HTTPNotFound()
 
 
 async def execute(req: web.Request) -> web.Response:
-    settings = get_settings()
-
     if not secrets.compare_digest(
         req.headers.get("X-Telegram-Bot-Api-Secret-Token", ""),
         settings.MAIN_WEBHOOK_SECRET_TOKEN,
     ):
         raise aiohttp.web.HTTPNotFound()
-    if not secrets.compare_digest(req.match_info["token"], settings.BOT_TOKEN):
-        raise aiohttp.web.HTTPNotFound()
-    scheduler: aiojobs.Scheduler = req.app["scheduler"]
-    if scheduler.pending_count >= settings.MAX_UPDATES_IN_QUEUE:
-        raise web.HTTPTooManyRequests()
-    if scheduler.closed:
+    check_token(req)
+    update_pool: UpdateWorkerPool = req.app["update_pool"]
+    if update_pool.closed:
         raise web.HTTPServiceUnavailable(reason="Closed queue")
-    await scheduler.spawn(
-        process_update(
-            types.Update(**(await req.json())), req.app["bot"], req.app["dp"]
-        )
-    )
+    # Only the update id is looked at here; the worker validates the rest.
+    try:
+        update = orjson.loads(await req.read())
+        update_id = int(update["update_id"])
+    except (orjson.JSONDecodeError, KeyError, TypeError, ValueError) as err:
+        raise web.HTTPBadRequest() from err
+    update_dedup: UpdateDeduplicator = req.app["update_dedup"]
+    if await update_dedup.is_duplicate(update_id):
+        return web.Response()
+    if not update_pool.submit(update):
+        await update_dedup.release(update_id)
+        raise web.HTTPTooManyRequests()
     return web.Response()
 
 
-tg_updates_app.add_routes([web.post("/bot/{token}", execute)])
+async def queue_stats(req: web.Request) -> web.Response:
+    check_token(req)
+    update_pool: UpdateWorkerPool = req.app["update_pool"]
+    update_dedup: UpdateDeduplicator = req.app["update_dedup"]
+    return web.json_response(
+        {**update_pool.stats(), "duplicates_suppressed": update_dedup.suppressed}
+    )
+
+
+tg_updates_app.add_routes(
+    [
+        web.post("/bot/{token}", execute),
+        web.get("/bot/{token}/stats", queue_stats),
+    ]
+)
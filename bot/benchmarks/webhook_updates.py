@@ -0,0 +1,113 @@
+"""
+Benchmark of the webhook endpoint.
+
+Replays a corpus of recorded updates (one JSON update per line) through
+the tg_updates aiohttp app over a local socket and reports requests per
+second and latency. Updates are handled by the real worker pool and a
+dispatcher without handlers, so nothing is sent to Telegram. Every
+request gets a fresh update_id, so none of them is taken for a duplicate.
+The client runs in the same event loop as the server, so the numbers are
+a lower bound and are meant for comparing changes on the same machine.
+
+Run it from the project root::
+
+    WEB_APP_URL=x python -m benchmarks.webhook_updates --requests 20000
+"""
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+from pathlib import Path
+
+import orjson
+import structlog
+from aiogram import Bot, Dispatcher
+from aiohttp import ClientSession, web
+
+from app.utils.update_dedup import UpdateDeduplicator
+from app.utils.update_pool import UpdateWorkerPool
+from app.web_handlers import tg_updates
+
+TOKEN = "123456:benchmark"
+SECRET = "benchmark"
+CORPUS = Path(__file__).with_name("updates.jsonl")
+
+
+def load_bodies(corpus: Path, requests: int) -> list[bytes]:
+    updates = [orjson.loads(line) for line in corpus.read_bytes().splitlines() if line.strip()]
+    bodies = []
+    for update_id, update in zip(range(1, requests + 1), itertools.cycle(updates)):
+        bodies.append(orjson.dumps({**update, "update_id": update_id}))
+    return bodies
+
+
+async def send_all(url: str, bodies: list[bytes], concurrency: int) -> list[float]:
+    latencies: list[float] = []
+    pending = iter(bodies)
+    headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET, "Content-Type": "application/json"}
+
+    async def client(session: ClientSession) -> None:
+        for body in pending:
+            start = time.perf_counter()
+            async with session.post(url, data=body, headers=headers) as response:
+                if response.status != 200:
+                    raise RuntimeError(f"Webhook answered {response.status}")
+            latencies.append(time.perf_counter() - start)
+
+    async with ClientSession() as session:
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+    return latencies
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", type=Path, default=CORPUS)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    tg_updates.settings.BOT_TOKEN = TOKEN
+    tg_updates.settings.MAIN_WEBHOOK_SECRET_TOKEN = SECRET
+    bot = Bot(TOKEN)
+    logger = structlog.get_logger()
+    # Every shard can hold the whole corpus: the webhook is measured, not
+    # how fast the workers keep up, which is reported as the drain time.
+    update_pool = UpdateWorkerPool(
+        bot, Dispatcher(), logger, shards=args.workers, max_queued=args.requests * args.workers
+    )
+    app = tg_updates.tg_updates_app
+    app["update_pool"] = update_pool
+    app["update_dedup"] = UpdateDeduplicator(logger)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    update_pool.start()
+
+    bodies = load_bodies(args.corpus, args.requests)
+    start = time.perf_counter()
+    latencies = await send_all(f"http://127.0.0.1:{port}/bot/{TOKEN}", bodies, args.concurrency)
+    elapsed = time.perf_counter() - start
+    abandoned = await update_pool.close(timeout=60)
+    drained = time.perf_counter() - start
+    await runner.cleanup()
+    await bot.session.close()
+
+    latencies.sort()
+    print(f"{len(bodies)} requests, concurrency {args.concurrency}")
+    print(f"{len(bodies) / elapsed:,.0f} req/s")
+    print(
+        f"latency p50 {statistics.median(latencies) * 1000:.2f} ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f} ms"
+    )
+    print(f"all updates handled after {drained:.2f} s")
+    if abandoned:
+        print(f"{abandoned} updates were still queued at the end")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
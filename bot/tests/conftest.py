@@ -0,0 +1,22 @@
+import os
+from typing import AsyncIterator, Optional
+
+import pytest
+from fakeredis.aioredis import FakeRedis
+
+os.environ.setdefault("WEB_APP_URL", "https://t.me/test_bot/app")
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture(params=["local", "redis"])
+async def redis(request: pytest.FixtureRequest) -> AsyncIterator[Optional[FakeRedis]]:
+    if request.param == "local":
+        yield None
+        return
+    client = FakeRedis()
+    yield client
+    await client.close()
@@ -0,0 +1,84 @@
+import asyncio
+import datetime
+from typing import Any
+
+import pytest
+import structlog
+from aiogram.methods import SendMessage
+from fakeredis.aioredis import FakeRedis
+
+from app.jobs import birthday_reminders
+from app.jobs.birthday_reminders import SENT_KEY, birthday_keys, claim_chats, send_reminders
+
+DAY = "2027-03-01"
+RECORDS = [{"id": i, "chat_id": i, "first_name": "Ann", "birthday_md": 301} for i in (1, 2, 3)]
+
+
+class FakeBot:
+    def __init__(self, errors: dict[int, list[BaseException]]):
+        self.errors = errors
+        self.sent: list[int] = []
+
+    async def __call__(self, method: SendMessage) -> None:
+        assert isinstance(method.chat_id, int)
+        errors = self.errors.get(method.chat_id)
+        if errors:
+            raise errors.pop(0)
+        self.sent.append(method.chat_id)
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(birthday_reminders, "SEND_RETRY_DELAY", 0)
+
+
+async def send(bot: FakeBot, redis: FakeRedis) -> Any:
+    claimed = await claim_chats(redis, DAY, RECORDS)  # type: ignore[arg-type]
+    return await send_reminders(
+        bot, redis, structlog.get_logger(), DAY, claimed, {301: True}  # type: ignore[arg-type]
+    )
+
+
+def test_leap_day_is_celebrated_on_march_first() -> None:
+    assert birthday_keys(datetime.date(2027, 2, 28)) == [228]
+    assert birthday_keys(datetime.date(2027, 3, 1)) == [301, 229]
+    assert birthday_keys(datetime.date(2028, 2, 29)) == [229]
+    assert birthday_keys(datetime.date(2028, 3, 1)) == [301]
+
+
+@pytest.mark.anyio
+async def test_failed_send_is_retried() -> None:
+    redis = FakeRedis()
+    bot = FakeBot({2: [RuntimeError("network is down")]})
+
+    sent, failed = await send(bot, redis)
+
+    assert (sent, failed) == (3, [])
+    assert sorted(bot.sent) == [1, 2, 3]
+
+
+@pytest.mark.anyio
+async def test_exhausted_chat_is_released() -> None:
+    redis = FakeRedis()
+    bot = FakeBot({2: [RuntimeError("network is down")] * 3})
+
+    sent, failed = await send(bot, redis)
+
+    assert sent == 2
+    assert [record["chat_id"] for record in failed] == [2]
+    assert not await redis.exists(SENT_KEY.format(day=DAY, chat_id=2))
+    assert await redis.exists(SENT_KEY.format(day=DAY, chat_id=1))
+
+
+@pytest.mark.anyio
+async def test_cancelled_send_releases_unsent_chats() -> None:
+    redis = FakeRedis()
+    bot = FakeBot({2: [asyncio.CancelledError()]})
+
+    with pytest.raises(asyncio.CancelledError):
+        await send(bot, redis)
+
+    assert sorted(bot.sent) == [1, 3]
+    assert not await redis.exists(SENT_KEY.format(day=DAY, chat_id=2))
+    assert await redis.exists(SENT_KEY.format(day=DAY, chat_id=1))
+    assert await redis.exists(SENT_KEY.format(day=DAY, chat_id=3))
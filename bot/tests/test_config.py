@@ -0,0 +1,26 @@
+import pytest
+
+from app.data.config import DefaultSettings
+
+
+@pytest.mark.parametrize(
+    ("env", "enabled"),
+    [
+        ({}, True),
+        ({"DEBUG": "true"}, False),
+        ({"DEBUG": "true", "OUTBOX_ENABLED": "true", "BIRTHDAY_REMINDERS_ENABLED": "true"}, True),
+        ({"OUTBOX_ENABLED": "false", "BIRTHDAY_REMINDERS_ENABLED": "false"}, False),
+    ],
+)
+def test_jobs_are_off_by_default_in_debug(
+    monkeypatch: pytest.MonkeyPatch, env: dict[str, str], enabled: bool
+) -> None:
+    for name in ("DEBUG", "OUTBOX_ENABLED", "BIRTHDAY_REMINDERS_ENABLED"):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+
+    settings = DefaultSettings()
+
+    assert settings.OUTBOX_ENABLED is enabled
+    assert settings.BIRTHDAY_REMINDERS_ENABLED is enabled
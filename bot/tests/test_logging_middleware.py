@@ -0,0 +1,51 @@
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+from aiogram.types import Update
+
+from app.middlewares import logging
+from app.middlewares.logging import StructLoggingMiddleware
+
+UPDATE = Update.model_validate(
+    {
+        "update_id": 1,
+        "message": {
+            "message_id": 1,
+            "date": 1700000000,
+            "chat": {"id": 1, "type": "private"},
+            "text": "hi",
+        },
+    }
+)
+
+
+@pytest.fixture(params=[True, False], ids=["sampled", "unsampled"])
+def sampled(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(logging, "sampled", lambda: request.param)
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("sampled")
+async def test_returns_handler_result() -> None:
+    async def handler(event: Update, data: dict[str, Any]) -> str:
+        return "result"
+
+    middleware = StructLoggingMiddleware(MagicMock())
+
+    assert await middleware(handler, UPDATE, {}) == "result"
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("sampled")
+async def test_failure_is_left_to_the_caller() -> None:
+    async def handler(event: Update, data: dict[str, Any]) -> None:
+        raise RuntimeError("boom")
+
+    logger = MagicMock()
+    logger.bind.return_value = logger
+    middleware = StructLoggingMiddleware(logger)
+
+    with pytest.raises(RuntimeError):
+        await middleware(handler, UPDATE, {})
+    logger.error.assert_not_called()
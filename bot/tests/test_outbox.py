@@ -0,0 +1,89 @@
+import asyncio
+from typing import Any
+
+import pytest
+import structlog
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import SendMessage
+from aiogram.methods.base import TelegramMethod
+from fakeredis.aioredis import FakeRedis
+
+from app.utils.outbox import Outbox
+
+
+class FakeBot:
+    def __init__(self, failures: int = 0, error: type[Exception] = RuntimeError):
+        self.sent: list[TelegramMethod[Any]] = []
+        self.failures = failures
+        self.error = error
+
+    async def __call__(self, method: TelegramMethod[Any]) -> None:
+        if self.failures:
+            self.failures -= 1
+            if self.error is TelegramBadRequest:
+                raise TelegramBadRequest(method, "chat not found")
+            raise self.error("network is down")
+        self.sent.append(method)
+
+
+@pytest.fixture
+async def outbox() -> Any:
+    redis = FakeRedis()
+    outbox = Outbox(redis, structlog.get_logger(), max_attempts=2, retry_idle=0.05)
+    await outbox.setup()
+    yield outbox
+    await redis.close()
+
+
+@pytest.mark.anyio
+async def test_delivers_and_acks(outbox: Outbox) -> None:
+    bot = FakeBot()
+
+    await outbox.enqueue(SendMessage(chat_id=1, text="hi"))
+    await outbox._process(bot, "worker")  # type: ignore[arg-type]
+
+    assert [(m.chat_id, m.text) for m in bot.sent] == [(1, "hi")]  # type: ignore[attr-defined]
+    assert await outbox._redis.xlen(outbox.stream) == 0
+
+
+@pytest.mark.anyio
+async def test_failed_entry_is_retried(outbox: Outbox) -> None:
+    bot = FakeBot(failures=1)
+
+    await outbox.enqueue(SendMessage(chat_id=1, text="hi"))
+    await outbox._process(bot, "worker")  # type: ignore[arg-type]
+    assert bot.sent == []
+
+    await asyncio.sleep(0.06)
+    await outbox._process(bot, "worker")  # type: ignore[arg-type]
+
+    assert len(bot.sent) == 1
+    assert await outbox._redis.xlen(outbox.dead_letter_stream) == 0
+
+
+@pytest.mark.anyio
+async def test_exhausted_entry_is_dead_lettered(outbox: Outbox) -> None:
+    bot = FakeBot(failures=10)
+
+    await outbox.enqueue(SendMessage(chat_id=1, text="hi"))
+    for _ in range(4):
+        await outbox._process(bot, "worker")  # type: ignore[arg-type]
+        await asyncio.sleep(0.06)
+
+    dead = await outbox._redis.xrange(outbox.dead_letter_stream)
+    assert len(dead) == 1
+    assert dead[0][1][b"error"] == b"max attempts exceeded"
+    assert await outbox._redis.xlen(outbox.stream) == 0
+
+
+@pytest.mark.anyio
+async def test_permanent_error_is_dead_lettered(outbox: Outbox) -> None:
+    bot = FakeBot(failures=1, error=TelegramBadRequest)
+
+    entry_id = await outbox.enqueue(SendMessage(chat_id=1, text="hi"))
+    await outbox._process(bot, "worker")  # type: ignore[arg-type]
+
+    dead = await outbox._redis.xrange(outbox.dead_letter_stream)
+    assert dead[0][1][b"entry_id"].decode() == entry_id
+    assert b"chat not found" in dead[0][1][b"error"]
+    assert await outbox._redis.xlen(outbox.stream) == 0
@@ -0,0 +1,89 @@
+import asyncio
+from typing import Optional
+from unittest.mock import MagicMock
+
+import pytest
+from redis.asyncio import Redis
+
+from app.utils.rate_limiter import RateLimiter
+
+
+async def timed_acquire(limiter: RateLimiter, chat_id: int) -> float:
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await limiter.acquire(chat_id)
+    return loop.time() - start
+
+
+@pytest.mark.anyio
+async def test_throttled_chat_does_not_hold_others(
+    redis: Optional[Redis],  # type: ignore[type-arg]
+) -> None:
+    limiter = RateLimiter(redis, global_rate=100, chat_rate=5)
+
+    # The second send to chat 111 waits for its chat slot.
+    await limiter.acquire(111)
+    waits = await asyncio.gather(timed_acquire(limiter, 111), timed_acquire(limiter, 222))
+
+    assert waits[0] >= 0.15
+    assert waits[1] < 0.1
+
+
+@pytest.mark.anyio
+async def test_penalized_chat_does_not_hold_others(
+    redis: Optional[Redis],  # type: ignore[type-arg]
+) -> None:
+    limiter = RateLimiter(redis, global_rate=100, chat_rate=5)
+
+    await limiter.penalize(111, 3)
+    first = asyncio.ensure_future(timed_acquire(limiter, 111))
+    await asyncio.sleep(0.01)
+
+    assert await timed_acquire(limiter, 333) < 0.1
+    first.cancel()
+
+
+@pytest.mark.anyio
+async def test_global_rate_is_shared(
+    redis: Optional[Redis],  # type: ignore[type-arg]
+) -> None:
+    limiter = RateLimiter(redis, global_rate=10, chat_rate=100)
+
+    waits = await asyncio.gather(*(timed_acquire(limiter, chat_id) for chat_id in range(1, 4)))
+
+    assert sorted(waits)[-1] >= 0.15
+
+
+async def send_time(limiter: RateLimiter, chat_id: int) -> float:
+    await limiter.acquire(chat_id)
+    return asyncio.get_running_loop().time()
+
+
+@pytest.mark.anyio
+async def test_delayed_chats_do_not_burst(
+    redis: Optional[Redis],  # type: ignore[type-arg]
+) -> None:
+    limiter = RateLimiter(redis, global_rate=10, chat_rate=5)
+    for chat_id in range(1, 4):
+        await limiter.penalize(chat_id, 0.2)
+
+    times = sorted(
+        await asyncio.gather(*(send_time(limiter, chat_id) for chat_id in range(1, 4)))
+    )
+
+    assert all(b - a >= 0.09 for a, b in zip(times, times[1:], strict=False))
+
+
+@pytest.mark.anyio
+async def test_falls_back_to_local_without_redis() -> None:
+    logger = MagicMock()
+    redis = Redis(host="127.0.0.1", port=1)
+    limiter = RateLimiter(redis, global_rate=100, chat_rate=5, logger=logger)
+
+    await limiter.penalize(111, 0.2)
+    waits = [await timed_acquire(limiter, 111), await timed_acquire(limiter, 111)]
+
+    assert waits[0] >= 0.15
+    assert waits[1] >= 0.15
+    logger.warning.assert_called_once()
+    await redis.close()
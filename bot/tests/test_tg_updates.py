@@ -0,0 +1,61 @@
+from typing import Any, AsyncIterator, Optional
+
+import orjson
+import pytest
+import structlog
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+from fakeredis.aioredis import FakeRedis
+from prometheus_client import REGISTRY
+
+from app.utils.update_dedup import UpdateDeduplicator
+from app.utils.update_pool import UpdateWorkerPool
+from app.web_handlers import tg_updates
+
+TOKEN = "123:test"
+SECRET = "webhook-secret"
+
+
+@pytest.fixture
+async def client(
+    monkeypatch: pytest.MonkeyPatch, redis: Optional[FakeRedis]
+) -> AsyncIterator[TestClient]:
+    monkeypatch.setattr(tg_updates.settings, "BOT_TOKEN", TOKEN)
+    monkeypatch.setattr(tg_updates.settings, "MAIN_WEBHOOK_SECRET_TOKEN", SECRET)
+    app = web.Application()
+    app.add_routes([web.post("/bot/{token}", tg_updates.execute)])
+    # Workers are not started, so the single queue slot stays taken.
+    app["update_pool"] = UpdateWorkerPool(
+        None, None, structlog.get_logger(), shards=1, max_queued=1  # type: ignore[arg-type]
+    )
+    app["update_dedup"] = UpdateDeduplicator(structlog.get_logger(), redis)
+    async with TestClient(TestServer(app)) as client:
+        yield client
+
+
+async def post_update(client: TestClient, update_id: int) -> Any:
+    response = await client.post(
+        f"/bot/{TOKEN}",
+        data=orjson.dumps({"update_id": update_id, "message": {"chat": {"id": 1}}}),
+        headers={"X-Telegram-Bot-Api-Secret-Token": SECRET},
+    )
+    return response.status
+
+
+def deduplicated() -> float:
+    return REGISTRY.get_sample_value("bot_updates_deduplicated_total") or 0
+
+
+@pytest.mark.anyio
+async def test_rejected_update_is_not_a_duplicate(client: TestClient) -> None:
+    before = deduplicated()
+    statuses = [await post_update(client, update_id) for update_id in (1, 2, 2, 2)]
+    assert statuses == [200, 429, 429, 429]
+
+    # Once there is room, the retry is queued and only then deduplicated.
+    pool: UpdateWorkerPool = client.app["update_pool"]
+    pool._queues[0].get_nowait()
+    assert [await post_update(client, 2) for _ in range(2)] == [200, 200]
+    assert pool.depth == 1
+    assert client.app["update_dedup"].suppressed == 1
+    assert deduplicated() - before == 1
@@ -0,0 +1,32 @@
+from typing import Any
+
+import pytest
+
+from app.utils.update_pool import update_chat_key
+
+
+@pytest.mark.parametrize(
+    ("update", "key"),
+    [
+        ({"update_id": 1, "message": {"chat": {"id": -100}, "from": {"id": 5}}}, -100),
+        ({"update_id": 1, "callback_query": {"message": {"chat": {"id": 7}}}}, 7),
+        ({"update_id": 1, "inline_query": {"from": {"id": 5}}}, 5),
+        ({"update_id": 1, "poll": {"id": "x"}}, 1),
+    ],
+)
+def test_update_chat_key(update: dict[str, Any], key: int) -> None:
+    assert update_chat_key(update) == key
+
+
+@pytest.mark.parametrize(
+    "update",
+    [
+        {"update_id": 1, "message": {"chat": "oops"}},
+        {"update_id": 1, "message": {"chat": {"type": "private"}}},
+        {"update_id": 1, "message": {"chat": {"id": "abc"}}},
+        {"update_id": 1, "callback_query": {"message": "oops"}},
+        {"update_id": 1, "message": {"from": None, "chat": None}, "edited_message": {"from": 3}},
+    ],
+)
+def test_malformed_update_goes_to_first_shard(update: dict[str, Any]) -> None:
+    assert update_chat_key(update) == 0
@@ -17,12 +17,17 @@ export interface IUser extends IResponse {
     share_link: string | null;
 }
 
+export interface IUserPage {
+    items: IUser[];
+    next_cursor: string | null;
+}
+
 export interface IGetUser {
     id?: number, 
     chatID?: number, 
     username?: string,
     limit?: number, 
-    offset?: number
+    cursor?: string
 }
 
 export default class ApiService {
@@ -74,7 +79,7 @@ export default class ApiService {
         })
     }
 
-    getUsers({limit, offset}: IGetUser): Promise<AxiosResponse<IUser[] | null>> {
-        return this.get("/user", {"limit": limit, "offset": offset})
+    getUsers({limit, cursor}: IGetUser): Promise<AxiosResponse<IUserPage>> {
+        return this.get("/user", {"limit": limit, "cursor": cursor})
     }
 }
\ No newline at end of file